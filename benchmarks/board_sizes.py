@@ -0,0 +1,133 @@
+# compares the evaluation and the search across board sizes and connection lengths
+#
+#   python -m benchmarks.board_sizes
+#   python -m benchmarks.board_sizes --sizes 6x7/4 7x8/4 6x7/5 8x9/5 --depth 6 --output sizes.json
+#
+# a size is written as rowsxcolumns/connect , every size is played from the same number of seeded random plies
+# the tables of a size are built on its first use , tables_ms is that one build and every later state ,
+# evaluator and search of the size reuses them
+# the incremental evaluation touches the windows of one cell per move , windows_per_move is their average count ,
+# its cost follows that number while the full rescan follows the number of windows of the board
+import argparse
+import json
+import random
+import sys
+import time
+from benchmarks.positions import build_state
+from benchmarks.suite import median_time
+from bitboard import AI_VALUE, board_config
+from evaluation import IncrementalEvaluator, evaluate_board, window_tables, window_scores, DEFAULT_WEIGHTS
+from search import Search
+
+DEFAULT_SIZES = ["6x7/4", "7x8/4", "6x7/5", "8x9/5", "9x10/6"]
+
+
+def parse_size(spec):
+    try:
+        board, connect = spec.split("/")
+        rows, columns = board.split("x")
+        return int(rows), int(columns), int(connect)
+    except ValueError:
+        raise argparse.ArgumentTypeError("a size is written as rowsxcolumns/connect , got %r" % spec)
+
+
+# the columns of plies seeded random moves , the AI is to move after them when plies is even
+def random_moves(config, plies, seed):
+    rng = random.Random(seed)
+    state = build_state([], config)
+    moves = []
+    attribute = AI_VALUE
+    for _ in range(plies):
+        col = rng.choice(state.valid_columns())
+        state.make_move(col, attribute)
+        moves.append(col)
+        attribute = -attribute
+    return moves
+
+
+def bench_size(rows, columns, connect, plies, depth, repeats):
+    start = time.perf_counter()
+    config = board_config(rows, columns, connect)
+    tables = window_tables(config)
+    window_scores(DEFAULT_WEIGHTS, connect)
+    tables_ms = (time.perf_counter() - start) * 1000
+
+    state = build_state(random_moves(config, plies, rows * 1000 + columns * 10 + connect), config)
+    evaluator = IncrementalEvaluator.from_state(state)
+    board = state.to_numpy()
+    moves = [(state.heights[col], col) for col in state.valid_columns()]
+    calls = 1000
+
+    def add_remove():
+        for _ in range(calls // len(moves)):
+            for row, col in moves:
+                evaluator.add(row, col, AI_VALUE)
+                evaluator.remove(row, col, AI_VALUE)
+
+    def full_rescan():
+        for _ in range(calls // 100):
+            evaluate_board(board, AI_VALUE, connect)
+
+    def connections_count():
+        for _ in range(calls):
+            state.connections_count(AI_VALUE)
+
+    def connection_columns():
+        for _ in range(calls):
+            state.connection_columns(AI_VALUE)
+
+    def search():
+        run = Search(state.copy(), IncrementalEvaluator.from_state(state))
+        run.alpha_beta(depth)
+        return run.nodes
+
+    nodes = search()
+    seconds = median_time(search, repeats)
+    return {
+        "windows": len(tables.windows),
+        "windows_per_move": sum(len(tables.cell_windows[col][row]) for row, col in moves) / len(moves),
+        "tables_ms": tables_ms,
+        "add_remove_us": median_time(add_remove, repeats) / (calls // len(moves) * len(moves)) * 1e6,
+        "evaluate_board_us": median_time(full_rescan, repeats) / (calls // 100) * 1e6,
+        "connections_count_us": median_time(connections_count, repeats) / calls * 1e6,
+        "connection_columns_us": median_time(connection_columns, repeats) / calls * 1e6,
+        "depth": depth,
+        "nodes": nodes,
+        "seconds": seconds,
+        "nodes_per_sec": nodes / seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluation and search cost across board sizes.")
+    parser.add_argument("--sizes", type=parse_size, nargs="+", default=[parse_size(size) for size in DEFAULT_SIZES])
+    parser.add_argument("--plies", type=int, default=10, help="random moves played before the measured position")
+    parser.add_argument("--depth", type=int, default=5, help="alpha-beta depth of the measured search")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="JSON file the results are written to")
+    args = parser.parse_args()
+
+    results = {}
+    for rows, columns, connect in args.sizes:
+        try:
+            results["%dx%d/%d" % (rows, columns, connect)] = bench_size(rows, columns, connect, args.plies,
+                                                                         args.depth, args.repeats)
+        except ValueError as error:
+            parser.error(str(error))
+        print("%dx%d/%d done" % (rows, columns, connect), file=sys.stderr)
+
+    print("%-9s %7s %6s %9s %9s %10s %8s %8s %9s %10s" % ("size", "windows", "/move", "tables_ms", "add_rm_us",
+                                                         "rescan_us", "count_us", "cols_us", "nodes", "nodes/s"))
+    for size, entry in results.items():
+        print("%-9s %7d %6.1f %9.2f %9.2f %10.1f %8.2f %8.2f %9d %10.0f"
+              % (size, entry["windows"], entry["windows_per_move"], entry["tables_ms"], entry["add_remove_us"],
+                 entry["evaluate_board_us"], entry["connections_count_us"], entry["connection_columns_us"],
+                 entry["nodes"], entry["nodes_per_sec"]))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({"plies": args.plies, "depth": args.depth, "repeats": args.repeats, "results": results},
+                      output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
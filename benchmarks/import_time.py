@@ -0,0 +1,51 @@
+# measures how long importing the engine takes in a fresh interpreter and checks it stays under the target ,
+# also checks that the import loads none of the GUI or optional modules
+#
+#   python -m benchmarks.import_time --runs 10 --target-ms 50
+import argparse
+import re
+import subprocess
+import sys
+
+# modules that must only be loaded when they are used
+LAZY_MODULES = ("pygame", "graphviz", "numpy", "concurrent.futures")
+
+
+# runs one import in a new interpreter and returns the cumulative import time of the module in ms
+def import_time_ms(module):
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module],
+                            capture_output=True, text=True, check=True).stderr
+    for line in output.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\S+)$", line)
+        if match and match.group(2) == module:
+            return int(match.group(1)) / 1000
+    raise RuntimeError("no import time reported for " + module)
+
+
+def loaded_lazy_modules(module):
+    code = "import sys , %s ; print(' '.join(name for name in %r if name in sys.modules))" % (module, LAZY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return output.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time of the headless engine.")
+    parser.add_argument("--module", default="engine")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--target-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    times = sorted(import_time_ms(args.module) for _ in range(args.runs))
+    median = times[len(times) // 2]
+    print("import %s : median %.1f ms , min %.1f ms , max %.1f ms over %d runs"
+          % (args.module, median, times[0], times[-1], args.runs))
+
+    loaded = loaded_lazy_modules(args.module)
+    if loaded:
+        raise SystemExit("import %s loaded %s" % (args.module, ", ".join(loaded)))
+    if median > args.target_ms:
+        raise SystemExit("import %s takes %.1f ms , the target is %.1f ms" % (args.module, median, args.target_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# plays N concurrent games against the game server and reports the latency of the moves
+#
+#   python server.py --workers 4 &
+#   python -m benchmarks.loadtest --sessions 50 --moves 10
+#   python -m benchmarks.loadtest --sessions 200 --spawn --workers 4
+#
+# every session starts a game and plays random columns , a move is timed from sending the request to reading the
+# whole response , so it includes the wait for a search worker and the search itself
+# moves answered with 503 or 504 are counted apart and retried after a short pause
+import argparse
+import asyncio
+import json
+import random
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+RETRY_PAUSE_S = 0.05
+
+
+async def request(host, port, method, path, body=None):
+    reader, writer = await asyncio.open_connection(host, port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write(("%s %s HTTP/1.1\r\nHost: %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n"
+                  "Connection: close\r\n\r\n" % (method, path, host, len(payload))).encode() + payload)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    record = json.loads(await reader.readexactly(length))
+    writer.close()
+    return status, record
+
+
+# plays one game until it is over or moves moves were played , returns (latencies , rejected , timed out)
+async def play_session(host, port, moves, algorithm, seed):
+    rng = random.Random(seed)
+    latencies = []
+    rejected = 0
+    timed_out = 0
+    status, record = await request(host, port, "POST", "/games", {"algorithm": algorithm})
+    while status in (503, 504):
+        rejected += status == 503
+        timed_out += status == 504
+        await asyncio.sleep(RETRY_PAUSE_S)
+        status, record = await request(host, port, "POST", "/games", {"algorithm": algorithm})
+    game_id = record["id"]
+    played = 0
+    while played < moves and not record["game_over"]:
+        col = rng.choice(record["valid_columns"])
+        start = time.perf_counter()
+        status, answer = await request(host, port, "POST", "/games/%s/moves" % game_id, {"col": col})
+        if status in (503, 504):
+            rejected += status == 503
+            timed_out += status == 504
+            await asyncio.sleep(RETRY_PAUSE_S)
+            continue
+        latencies.append(time.perf_counter() - start)
+        record = answer
+        played += 1
+    await request(host, port, "DELETE", "/games/%s" % game_id)
+    return latencies, rejected, timed_out
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run(args):
+    start = time.perf_counter()
+    results = await asyncio.gather(*(play_session(args.host, args.port, args.moves, args.algorithm, session)
+                                     for session in range(args.sessions)))
+    elapsed = time.perf_counter() - start
+    latencies = [latency for session_latencies, _, _ in results for latency in session_latencies]
+    rejected = sum(result[1] for result in results)
+    timed_out = sum(result[2] for result in results)
+    if not latencies:
+        print("no move was answered", file=sys.stderr)
+        return
+    print("%d sessions , %d moves in %.2f s , %.1f moves/sec"
+          % (args.sessions, len(latencies), elapsed, len(latencies) / elapsed))
+    print("latency ms  p50 %.1f  p90 %.1f  p99 %.1f  max %.1f  mean %.1f"
+          % (percentile(latencies, 0.5) * 1000, percentile(latencies, 0.9) * 1000,
+             percentile(latencies, 0.99) * 1000, max(latencies) * 1000, statistics.mean(latencies) * 1000))
+    print("%d moves turned away with 503 , %d timed out with 504" % (rejected, timed_out))
+
+
+# starts server.py and waits until it accepts connections
+def spawn_server(args):
+    command = [sys.executable, "server.py", "--host", args.host, "--port", str(args.port)]
+    if args.workers:
+        command += ["--workers", str(args.workers)]
+    process = subprocess.Popen(command)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            asyncio.run(request(args.host, args.port, "GET", "/stats"))
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise SystemExit("the server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test of the game server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8404)
+    parser.add_argument("--sessions", type=int, default=20, help="games played at the same time")
+    parser.add_argument("--moves", type=int, default=10, help="player moves of every game")
+    parser.add_argument("--algorithm", default="alpha_beta")
+    parser.add_argument("--spawn", action="store_true", help="start server.py for the test")
+    parser.add_argument("--workers", type=int, help="search workers of the spawned server")
+    args = parser.parse_args()
+
+    process = spawn_server(args) if args.spawn else None
+    try:
+        asyncio.run(run(args))
+    finally:
+        if process is not None:
+            # an interrupt lets the server shut its worker pool down
+            process.send_signal(signal.SIGINT)
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# measures how the root-split parallel search scales from 1 to N worker processes
+# and checks that every run gives the same score and column as the serial search
+#
+#   python -m benchmarks.parallel_scaling --depth 8 --workers 1 2 4 8 16
+import argparse
+import os
+import time
+from benchmarks.positions import POSITIONS, build_state
+from evaluation import IncrementalEvaluator
+from parallel import ParallelSearch
+from search import Search
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling of the root-split parallel search.")
+    parser.add_argument("--depth", type=int, default=7)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()])
+    args = parser.parse_args()
+
+    for name, moves in POSITIONS.items():
+        state = build_state(moves)
+        search = Search(state.copy(), IncrementalEvaluator.from_state(state))
+        start = time.perf_counter()
+        serial = search.alpha_beta(args.depth)
+        serial_time = time.perf_counter() - start
+        print("%-8s serial     %8.3f s  %9d nodes  score %s column %s"
+              % (name, serial_time, search.nodes, serial[0], serial[1]))
+
+        for workers in args.workers:
+            with ParallelSearch(workers) as parallel:
+                # warm the pool up so process start-up is not measured
+                parallel.alpha_beta(state, 1)
+                start = time.perf_counter()
+                result = parallel.alpha_beta(state, args.depth)
+                elapsed = time.perf_counter() - start
+            if result != serial:
+                raise SystemExit("%s with %d workers gave %s , the serial search gave %s"
+                                 % (name, workers, result, serial))
+            print("%-8s %2d workers %8.3f s  %9d nodes  speedup %.2fx"
+                  % (name, workers, elapsed, parallel.nodes, serial_time / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# measures the position cache : plays the same seeded games twice through one cache file , the first pass starts
+# from an empty file and the second reopens it , then reopens it with other weights , which must find nothing
+#
+#   python -m benchmarks.position_cache
+#   python -m benchmarks.position_cache --games 40 --depth 6 --output cache.json
+#
+# both sides are alpha-beta to --depth through C4Puzzle.search , the player side searches the swapped position ,
+# the games differ by their --opening-plies seeded random moves , every pass reports the hit rate , the mean probe
+# latency of the memory tier and of the file , the mean flush time and the mean time of a move
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from bitboard import BitBoard, AI_VALUE, PLAYER_VALUE
+from cache import PositionCache
+from engine import C4Puzzle, ALPHA_BETA
+from evaluation import DEFAULT_WEIGHTS, Weights
+
+
+# plays one game with both sides searching through the cache , returns the number of moves searched
+def play_game(cache, seed, opening_plies, depth):
+    rng = random.Random(seed)
+    state = BitBoard()
+    attribute = AI_VALUE
+    searched = 0
+    while not state.is_full():
+        if state.moves_played < opening_plies:
+            col = rng.choice(state.valid_columns())
+        else:
+            position = state if attribute == AI_VALUE else state.swapped()
+            col, _ = C4Puzzle(position.copy()).search(depth, ALPHA_BETA, cache=cache)
+            searched += 1
+        state.make_move(col, attribute)
+        attribute = PLAYER_VALUE if attribute == AI_VALUE else AI_VALUE
+    return searched
+
+
+def run_pass(path, weights, games, opening_plies, depth):
+    start = time.perf_counter()
+    cache = PositionCache(path, weights)
+    load_ms = (time.perf_counter() - start) * 1000
+    loaded = len(cache.entries)
+    moves = 0
+    start = time.perf_counter()
+    for game in range(games):
+        moves += play_game(cache, game, opening_plies, depth)
+    seconds = time.perf_counter() - start
+    cache.close()
+    record = cache.stats()
+    record.update({"loaded": loaded, "load_ms": load_ms, "moves": moves, "move_ms": seconds / moves * 1000})
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hit rate and latency of the persistent position cache.")
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--opening-plies", type=int, default=4, help="seeded random moves that start every game")
+    parser.add_argument("--depth", type=int, default=5, help="alpha-beta depth of every move")
+    parser.add_argument("--file", help="cache file , a temporary file that is removed after the run by default")
+    parser.add_argument("--output", help="JSON file the results are written to")
+    args = parser.parse_args()
+
+    path = args.file or os.path.join(tempfile.mkdtemp(), "positions.db")
+    retuned = Weights(DEFAULT_WEIGHTS.four, DEFAULT_WEIGHTS.three + 1, DEFAULT_WEIGHTS.two, DEFAULT_WEIGHTS.center)
+    results = {}
+    try:
+        for name, weights in (("cold", DEFAULT_WEIGHTS), ("warm", DEFAULT_WEIGHTS), ("retuned", retuned)):
+            results[name] = run_pass(path, weights, args.games, args.opening_plies, args.depth)
+    finally:
+        if not args.file:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+            os.rmdir(os.path.dirname(path))
+
+    print("%-8s %7s %7s %9s %8s %10s %9s %9s %9s" % ("pass", "loaded", "moves", "hit_rate", "mem_us", "disk_us",
+                                                     "flush_ms", "load_ms", "move_ms"))
+    for name, entry in results.items():
+        print("%-8s %7d %7d %9.3f %8.2f %10.2f %9.2f %9.2f %9.2f"
+              % (name, entry["loaded"], entry["moves"], entry["hit_rate"], entry["memory_probe_us"],
+                 entry["disk_probe_us"], entry["flush_ms"], entry["load_ms"], entry["move_ms"]))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({"games": args.games, "opening_plies": args.opening_plies, "depth": args.depth,
+                       "results": results}, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
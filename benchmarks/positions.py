@@ -0,0 +1,19 @@
+from bitboard import BitBoard, PLAYER_VALUE, AI_VALUE, DEFAULT_CONFIG
+
+# the fixed positions used by the benchmarks , as the columns played from the empty board starting with the AI ,
+# the AI is to move in all of them
+POSITIONS = {
+    "opening": [],
+    "midgame": [3, 3, 2, 4, 4, 2, 1, 5, 3, 3],
+    "near_full": [4, 0, 3, 3, 4, 0, 1, 3, 6, 3, 6, 2, 5, 6, 1, 0, 4, 3, 2, 0, 1, 5, 2, 0, 3, 1, 5, 2, 4, 4, 2, 6,
+                  2, 5, 1, 4],
+}
+
+
+def build_state(moves, config=DEFAULT_CONFIG):
+    state = BitBoard(config)
+    attribute = AI_VALUE
+    for col in moves:
+        state.make_move(col, attribute)
+        attribute = PLAYER_VALUE if attribute == AI_VALUE else AI_VALUE
+    return state
@@ -0,0 +1,186 @@
+# benchmarks the search and evaluation hot paths on the fixed positions of benchmarks/positions.py
+# and writes the results as JSON , compare mode flags every metric that got worse than a saved baseline
+#
+#   python -m benchmarks.suite --output baseline.json
+#   python -m benchmarks.suite --output current.json --compare baseline.json --threshold 0.15
+#
+# times are the median of --repeats runs , node counts are deterministic , peak memory is measured
+# with tracemalloc in a separate run so it does not slow the timed runs down
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from benchmarks.positions import POSITIONS, build_state
+from engine import C4Puzzle
+from bitboard import AI_VALUE
+from evaluation import IncrementalEvaluator, evaluate_board
+from search import Search
+from transposition import TranspositionTable
+
+# metrics where a higher value is better , every other metric is better when lower
+HIGHER_IS_BETTER = ("nodes_per_sec",)
+# metrics that are not compared , they describe the run and not its speed
+NOT_COMPARED = ("depth", "score", "column", "pruning_ratio")
+
+SEARCHES = ("minimax", "alpha_beta", "alpha_beta_table")
+# a small table so allocating it does not dominate the time of the shallow searches
+TABLE_SIZE_MB = 1
+
+
+# median time of a call in seconds
+def median_time(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+# peak memory allocated while func runs in KB
+def peak_memory_kb(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+# microseconds per call of the functions called at every node of the search
+def bench_hot_paths(state, repeats):
+    node = C4Puzzle(state.copy())
+    board = node.board
+    calls = 1000
+
+    def generate_children():
+        for _ in range(calls // 10):
+            node.children = []
+            node.generate_children(AI_VALUE)
+
+    def evaluate_windows():
+        for _ in range(calls):
+            node.evaluate_windows(AI_VALUE)
+
+    def full_rescan():
+        for _ in range(calls // 10):
+            evaluate_board(board, AI_VALUE)
+
+    def connections_count():
+        for _ in range(calls):
+            node.connections_count(AI_VALUE)
+
+    return {
+        "generate_children_us": median_time(generate_children, repeats) / (calls // 10) * 1e6,
+        "evaluate_windows_us": median_time(evaluate_windows, repeats) / calls * 1e6,
+        "evaluate_board_us": median_time(full_rescan, repeats) / (calls // 10) * 1e6,
+        "connections_count_us": median_time(connections_count, repeats) / calls * 1e6,
+    }
+
+
+def run_search(state, name, depth):
+    table = TranspositionTable(TABLE_SIZE_MB) if name == "alpha_beta_table" else None
+    search = Search(state.copy(), IncrementalEvaluator.from_state(state), table)
+    if name == "minimax":
+        utility, col = search.minimax(depth)
+    else:
+        utility, col = search.alpha_beta(depth)
+    return search.nodes, utility, col
+
+
+def bench_search(state, name, depth, repeats):
+    nodes, utility, col = run_search(state, name, depth)
+    seconds = median_time(lambda: run_search(state, name, depth), repeats)
+    return {
+        "depth": depth,
+        "score": utility,
+        "column": col,
+        "nodes": nodes,
+        "seconds": seconds,
+        "nodes_per_sec": nodes / seconds,
+        "peak_kb": peak_memory_kb(lambda: run_search(state, name, depth)),
+    }
+
+
+def run_suite(depths, repeats):
+    results = {}
+    for position, moves in POSITIONS.items():
+        state = build_state(moves)
+        results[position + "/hot_paths"] = bench_hot_paths(state, repeats)
+        for depth in depths:
+            for name in SEARCHES:
+                results["%s/%s/depth_%d" % (position, name, depth)] = bench_search(state, name, depth, repeats)
+            # share of the minimax nodes that alpha-beta still visits
+            minimax_nodes = results["%s/minimax/depth_%d" % (position, depth)]["nodes"]
+            for name in SEARCHES[1:]:
+                entry = results["%s/%s/depth_%d" % (position, name, depth)]
+                entry["pruning_ratio"] = entry["nodes"] / minimax_nodes
+            print("%-10s depth %d done" % (position, depth), file=sys.stderr)
+    return results
+
+
+# returns a list of (key , metric , baseline value , current value) for every metric worse by more than threshold
+def compare(baseline, current, threshold):
+    regressions = []
+    for key, metrics in baseline["results"].items():
+        for metric, old in metrics.items():
+            if metric in NOT_COMPARED or key not in current["results"]:
+                continue
+            new = current["results"][key].get(metric)
+            if new is None or not old:
+                continue
+            if metric in HIGHER_IS_BETTER:
+                worse = new < old * (1 - threshold)
+            else:
+                worse = new > old * (1 + threshold)
+            if worse:
+                regressions.append((key, metric, old, new))
+    return regressions
+
+
+def print_results(results):
+    for key, metrics in results.items():
+        print(key)
+        for metric, value in metrics.items():
+            print("    %-22s %s" % (metric, round(value, 3) if isinstance(value, float) else value))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks of the search and evaluation hot paths.")
+    parser.add_argument("--depths", type=int, nargs="+", default=[2, 4, 6])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="JSON file the results are written to")
+    parser.add_argument("--compare", help="baseline JSON file to flag regressions against")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="relative change that counts as a regression")
+    args = parser.parse_args()
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "depths": args.depths,
+        "repeats": args.repeats,
+        "results": run_suite(args.depths, args.repeats),
+    }
+    print_results(report["results"])
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(baseline, report, args.threshold)
+        for key, metric, old, new in regressions:
+            print("REGRESSION %s %s : %.4g -> %.4g" % (key, metric, old, new))
+        if regressions:
+            raise SystemExit(1)
+        print("no regressions against %s" % args.compare)
+
+
+if __name__ == "__main__":
+    main()
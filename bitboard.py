@@ -0,0 +1,358 @@
+import random
+
+ROWS_COUNT = 6
+COLUMNS_COUNT = 7
+
+# Setting the values inside the board
+PLAYER_VALUE = 1
+AI_VALUE = -1
+EMPTY = 0
+
+# the number of coins in a row that make a connection on the default board
+CONNECT_COUNT = 4
+
+# seed of the Zobrist keys of every board , see BoardConfig
+ZOBRIST_SEED = 20240401
+
+
+# the geometry of one board size and connection length : the bit layout , masks , shifts , Zobrist keys and
+# move orders derived from them , built once by board_config and shared by every state of that size
+# every column takes rows bits plus one always-empty sentinel bit on top ,
+# the sentinel stops the shifted masks from wrapping from one column into the next
+# bit (col * column_height + row) stores the cell at (row , col)
+class BoardConfig:
+    __slots__ = ("rows", "columns", "connect", "cells", "column_height", "column_mask", "bottom_mask", "board_mask",
+                 "direction_shifts", "run_shifts", "line_shifts", "player_zobrist", "ai_zobrist",
+                 "player_mirror_zobrist", "ai_mirror_zobrist", "center_order", "mirror_half")
+
+    def __init__(self, rows, columns, connect):
+        self.rows = rows
+        self.columns = columns
+        self.connect = connect
+        self.cells = rows * columns
+        self.column_height = rows + 1
+        # the bits of one column
+        self.column_mask = (1 << self.column_height) - 1
+        # the bottom cell of every column , and every cell of the board without the sentinel bits
+        self.bottom_mask = sum(1 << (col * self.column_height) for col in range(columns))
+        self.board_mask = self.bottom_mask * ((1 << rows) - 1)
+        # bit shifts that move a cell to its neighbour in each direction :
+        # vertical , horizontal , positive diagonal , negative diagonal
+        self.direction_shifts = (1, self.column_height, self.column_height + 1, self.column_height - 1)
+        # for every direction the shifts that double the length of the runs until they reach connect ,
+        # see count_connections
+        self.run_shifts = []
+        for shift in self.direction_shifts:
+            steps = []
+            length = 1
+            while length < connect:
+                step = min(length, connect - length)
+                steps.append(step * shift)
+                length += step
+            self.run_shifts.append(tuple(steps))
+        # for every direction but the vertical one the shifts used by completing_cells :
+        # the shifts that move a cell 1 , 2 ... connect - 1 cells away , the shift of connect cells ,
+        # and the shifts of connect - 1 ... 2 cells
+        self.line_shifts = [(tuple(step * shift for step in range(1, connect)), connect * shift,
+                             tuple(step * shift for step in range(connect - 1, 1, -1)))
+                            for shift in self.direction_shifts[1:]]
+        # random 64-bit Zobrist keys for every bit of each side , seeded so hashes are the same in every process ,
+        # the sizes are part of the seed so the same coins on two boards do not share a hash in a shared table ,
+        # the default board keeps its plain seed
+        bits_count = columns * self.column_height
+        if (rows, columns, connect) == (ROWS_COUNT, COLUMNS_COUNT, CONNECT_COUNT):
+            zobrist_random = random.Random(ZOBRIST_SEED)
+        else:
+            zobrist_random = random.Random("%d:%dx%d/%d" % (ZOBRIST_SEED, rows, columns, connect))
+        self.player_zobrist = [zobrist_random.getrandbits(64) for _ in range(bits_count)]
+        self.ai_zobrist = [zobrist_random.getrandbits(64) for _ in range(bits_count)]
+        # the keys of the mirrored bit , hashing a position with them gives the hash of its left-right mirror
+        mirror_index = [self.mirror_col(index // self.column_height) * self.column_height + index % self.column_height
+                        for index in range(bits_count)]
+        self.player_mirror_zobrist = [self.player_zobrist[index] for index in mirror_index]
+        self.ai_mirror_zobrist = [self.ai_zobrist[index] for index in mirror_index]
+        # columns tried from the center outwards , center columns take part in more windows
+        self.center_order = sorted(range(columns), key=lambda col: abs(2 * col - (columns - 1)))
+        # the columns from the center to the left edge , one of every column and its mirror
+        self.mirror_half = [col for col in self.center_order if col <= self.mirror_col(col)]
+
+    # pickles as the three sizes , the other process gets the config it built for that size
+    def __reduce__(self):
+        return board_config, (self.rows, self.columns, self.connect)
+
+    # index of the bit that stores the cell at (row , col)
+    def cell_bit(self, row, col):
+        return col * self.column_height + row
+
+    # the column a move is played in on the mirrored board
+    def mirror_col(self, col):
+        return self.columns - 1 - col
+
+    # the bitboard reflected left to right , column col moves to column columns - 1 - col
+    def mirror_bits(self, bits):
+        mirrored = 0
+        for col in range(self.columns):
+            mirrored |= ((bits >> (col * self.column_height)) & self.column_mask) \
+                << (self.mirror_col(col) * self.column_height)
+        return mirrored
+
+    # counts the connections in a bitboard , overlapping connections are counted separately
+    # every shift doubles the length of the runs found so far until it reaches connect
+    def count_connections(self, bits):
+        count = 0
+        if self.connect == 4:
+            # the usual length , unrolled
+            for shift in self.direction_shifts:
+                pairs = bits & (bits >> shift)
+                count += (pairs & (pairs >> (2 * shift))).bit_count()
+            return count
+        for shifts in self.run_shifts:
+            runs = bits
+            for shift in shifts:
+                runs &= runs >> shift
+            count += runs.bit_count()
+        return count
+
+    # the empty cells that would complete a connection for the coins in bits , reachable or not
+    def completing_cells(self, bits, mask):
+        connect = self.connect
+        if connect == 4:
+            # the usual length , unrolled : only the cell on top of three coins completes a vertical 4
+            cells = (bits << 1) & (bits << 2) & (bits << 3)
+            for shift in self.direction_shifts[1:]:
+                # the cell is at the end of three coins , or has one coin on one side and two on the other
+                pairs = (bits << shift) & (bits << (2 * shift))
+                cells |= pairs & (bits << (3 * shift))
+                cells |= pairs & (bits >> shift)
+                pairs = (bits >> shift) & (bits >> (2 * shift))
+                cells |= pairs & (bits << shift)
+                cells |= pairs & (bits >> (3 * shift))
+            return cells & (self.board_mask ^ mask)
+        # only the cell on top of connect - 1 coins completes a vertical connection
+        cells = -1
+        for step in range(1, connect):
+            cells &= bits << step
+        for shifts, full_shift, right_shifts in self.line_shifts:
+            # runs[k] is the cells with k + 1 coins in a row on their left , shifting it right by k + 2 cells
+            # gives the cells with k + 1 coins on their right , the cell completes a connection with all
+            # connect - 1 coins on one side or some on each side
+            run = bits << shifts[0]
+            runs = [run]
+            for shift in shifts[1:]:
+                run &= bits << shift
+                runs.append(run)
+            cells |= run | (run >> full_shift)
+            for count, shift in enumerate(right_shifts):
+                cells |= runs[count] & (runs[connect - 3 - count] >> shift)
+        return cells & (self.board_mask ^ mask)
+
+
+# the configs built so far by their (rows , columns , connect)
+BOARD_CONFIGS = {}
+
+
+# the config of a board size and connection length , built on the first call and cached
+def board_config(rows=ROWS_COUNT, columns=COLUMNS_COUNT, connect=CONNECT_COUNT):
+    size = (rows, columns, connect)
+    config = BOARD_CONFIGS.get(size)
+    if config is None:
+        if rows < 1 or columns < 1:
+            raise ValueError("a board needs at least one row and one column , got %d x %d" % (rows, columns))
+        if not 3 <= connect <= max(rows, columns):
+            raise ValueError("connect must be at least 3 and fit on a %d x %d board , got %d"
+                             % (rows, columns, connect))
+        config = BOARD_CONFIGS[size] = BoardConfig(rows, columns, connect)
+    return config
+
+
+# the board the GUI plays on , states and evaluators use it when no other config is given
+DEFAULT_CONFIG = board_config()
+
+
+# a number that identifies a position exactly , unlike the Zobrist hash it never collides :
+# the occupied cells give the heights and the AI coins among them give the owners
+def position_key(player_bits, ai_bits):
+    return ai_bits + (player_bits | ai_bits)
+
+
+# the game state as two bitboards , one per side , plus the height of every column
+# bit (col * column_height + row) is set in a side's bitboard if that side owns the cell , see BoardConfig
+class BitBoard:
+    __slots__ = ("player_bits", "ai_bits", "heights", "moves_played", "hash", "mirror_hash", "config")
+
+    def __init__(self, config=DEFAULT_CONFIG):
+        self.config = config
+        self.player_bits = 0
+        self.ai_bits = 0
+        # Zobrist hash of the position , updated on every make and unmake
+        self.hash = 0
+        # Zobrist hash of the left-right mirror of the position
+        self.mirror_hash = 0
+        # the row in which the next coin dropped in each column will land
+        self.heights = [0] * config.columns
+        self.moves_played = 0
+
+    def copy(self):
+        new_state = BitBoard.__new__(BitBoard)
+        new_state.config = self.config
+        new_state.player_bits = self.player_bits
+        new_state.ai_bits = self.ai_bits
+        new_state.heights = self.heights[:]
+        new_state.moves_played = self.moves_played
+        new_state.hash = self.hash
+        new_state.mirror_hash = self.mirror_hash
+        return new_state
+
+    # rebuilds a state from the two bitboards , heights and hash are recomputed
+    @classmethod
+    def from_bits(cls, player_bits, ai_bits, config=DEFAULT_CONFIG):
+        state = cls(config)
+        for col in range(config.columns):
+            for row in range(config.rows):
+                bit = 1 << config.cell_bit(row, col)
+                if player_bits & bit:
+                    state.make_move(col, PLAYER_VALUE)
+                elif ai_bits & bit:
+                    state.make_move(col, AI_VALUE)
+                else:
+                    break
+        return state
+
+    # the same position with the coins of the two sides exchanged ,
+    # lets a search that always maximizes for the AI choose moves for the player
+    def swapped(self):
+        return BitBoard.from_bits(self.ai_bits, self.player_bits, self.config)
+
+    # pickles as the two bitboards and the config only , keeps the messages sent to search worker processes small
+    def __reduce__(self):
+        return BitBoard.from_bits, (self.player_bits, self.ai_bits, self.config)
+
+    # all the occupied cells regardless of the owner
+    def mask(self):
+        return self.player_bits | self.ai_bits
+
+    # the exact key of the position , see position_key
+    def key(self):
+        return position_key(self.player_bits, self.ai_bits)
+
+    # the exact key of the position reflected left to right
+    def mirrored_key(self):
+        return position_key(self.config.mirror_bits(self.player_bits), self.config.mirror_bits(self.ai_bits))
+
+    # true when the position is its own mirror , then a move and its mirrored move lead to mirrored positions
+    # with the same score , compared through the hashes like the transposition table compares positions
+    def is_symmetric(self):
+        return self.hash == self.mirror_hash
+
+    def bits(self, attribute):
+        if attribute == PLAYER_VALUE:
+            return self.player_bits
+        return self.ai_bits
+
+    def can_play(self, col):
+        return 0 <= col < self.config.columns and self.heights[col] < self.config.rows
+
+    def valid_columns(self):
+        rows = self.config.rows
+        return [col for col, height in enumerate(self.heights) if height < rows]
+
+    def is_full(self):
+        return self.moves_played == self.config.cells
+
+    # drops a coin in the given column , returns the row in which it landed
+    # the caller is responsible for checking can_play first
+    def make_move(self, col, attribute):
+        config = self.config
+        row = self.heights[col]
+        index = col * config.column_height + row
+        bit = 1 << index
+        if attribute == PLAYER_VALUE:
+            self.player_bits |= bit
+            self.hash ^= config.player_zobrist[index]
+            self.mirror_hash ^= config.player_mirror_zobrist[index]
+        else:
+            self.ai_bits |= bit
+            self.hash ^= config.ai_zobrist[index]
+            self.mirror_hash ^= config.ai_mirror_zobrist[index]
+        self.heights[col] = row + 1
+        self.moves_played += 1
+        return row
+
+    # removes the top coin of the given column , returns the row and the value it had
+    def unmake_move(self, col):
+        config = self.config
+        row = self.heights[col] - 1
+        index = col * config.column_height + row
+        bit = 1 << index
+        if self.player_bits & bit:
+            self.player_bits ^= bit
+            self.hash ^= config.player_zobrist[index]
+            self.mirror_hash ^= config.player_mirror_zobrist[index]
+            attribute = PLAYER_VALUE
+        else:
+            self.ai_bits ^= bit
+            self.hash ^= config.ai_zobrist[index]
+            self.mirror_hash ^= config.ai_mirror_zobrist[index]
+            attribute = AI_VALUE
+        self.heights[col] = row
+        self.moves_played -= 1
+        return row, attribute
+
+    # the value stored in a cell ; PLAYER_VALUE or AI_VALUE or EMPTY
+    def cell(self, row, col):
+        bit = 1 << self.config.cell_bit(row, col)
+        if self.player_bits & bit:
+            return PLAYER_VALUE
+        if self.ai_bits & bit:
+            return AI_VALUE
+        return EMPTY
+
+    # counts how many connections a side has , overlapping connections are counted separately
+    # the same way the cell by cell scan counts them
+    def connections_count(self, attribute):
+        return self.config.count_connections(self.bits(attribute))
+
+    # the lead of the AI in connections when the result of the game can no longer change , None otherwise
+    # the game only ends on a full board , but a side that leads by more connections than the other side can still
+    # make with the windows free of its coins has already won
+    def decided_lead(self):
+        config = self.config
+        ai_count = config.count_connections(self.ai_bits)
+        player_count = config.count_connections(self.player_bits)
+        lead = ai_count - player_count
+        if self.moves_played == config.cells:
+            return lead
+        if lead > 0 and lead > config.count_connections(config.board_mask ^ self.ai_bits) - player_count:
+            return lead
+        if lead < 0 and -lead > config.count_connections(config.board_mask ^ self.player_bits) - ai_count:
+            return lead
+        return None
+
+    # the columns where a coin of the given side completes at least one connection
+    def connection_columns(self, attribute):
+        config = self.config
+        mask = self.player_bits | self.ai_bits
+        cells = config.completing_cells(self.bits(attribute), mask) & (mask + config.bottom_mask)
+        return [col for col in range(config.columns)
+                if cells >> (col * config.column_height) & config.column_mask]
+
+    # the board in the numpy layout used by the GUI , row 0 is the bottom row
+    def to_numpy(self):
+        import numpy
+        board = numpy.zeros((self.config.rows, self.config.columns), int)
+        for col, height in enumerate(self.heights):
+            for row in range(height):
+                board[row][col] = self.cell(row, col)
+        return board
+
+    # the size of the board is the shape of the array , connect is the length of a connection on it
+    @classmethod
+    def from_numpy(cls, board, connect=CONNECT_COUNT):
+        rows, columns = board.shape
+        state = cls(board_config(rows, columns, connect))
+        for col in range(columns):
+            for row in range(rows):
+                if board[row][col] == EMPTY:
+                    break
+                state.make_move(col, int(board[row][col]))
+        return state
@@ -0,0 +1,169 @@
+# opening book : the best AI move and its score for every position up to a number of plies ,
+# searched once ahead of time and stored in a sorted binary file the engine memory-maps and binary searches
+#
+#   python book.py --plies 4 --depth 8 --output book.bin
+#
+# positions are stored once for a position and its left-right mirror , under the smaller of the two exact keys
+# (see bitboard.position_key) , the stored move belongs to the position with that key and is mirrored back
+# when the probed position is the other one
+# the AI is the side to move in every stored position , the GUI lets it move first so those are the even plies ,
+# the odd plies are added for games where the player moved first
+# the book holds positions of the default board , see bitboard.DEFAULT_CONFIG , other boards are never found in it
+import argparse
+import mmap
+import struct
+import sys
+import time
+import zlib
+from bitboard import BitBoard, PLAYER_VALUE, AI_VALUE, DEFAULT_CONFIG
+from evaluation import IncrementalEvaluator, DEFAULT_WEIGHTS, evaluation_version
+from search import Search
+from transposition import TranspositionTable
+
+MAGIC = b"C4BK"
+VERSION = 2
+# magic , version , search depth , number of records , checksum of the evaluation version the scores come from
+HEADER = struct.Struct("<4sHHII")
+# exact position key , score , column
+RECORD = struct.Struct("<Qib")
+
+# memory cap of the table shared by all the searches of the book
+TABLE_SIZE_MB = 64
+
+
+# the key a position is stored under and whether it is the mirror of the position
+def canonical_key(state):
+    key = state.key()
+    mirrored = state.mirrored_key()
+    if mirrored < key:
+        return mirrored, True
+    return key, False
+
+
+# the positions with at most plies coins where the AI is to move , as a dict of canonical key to
+# (state , mirrored) , one state for a position and its mirror
+def book_positions(plies):
+    positions = {}
+
+    def visit(state, attribute):
+        if attribute == AI_VALUE:
+            key, mirrored = canonical_key(state)
+            if key in positions:
+                return
+            positions[key] = (state.copy(), mirrored)
+        if state.moves_played == plies:
+            return
+        for col in state.valid_columns():
+            state.make_move(col, attribute)
+            visit(state, -attribute)
+            state.unmake_move(col)
+
+    # AI first , then player first
+    visit(BitBoard(), AI_VALUE)
+    visit(BitBoard(), PLAYER_VALUE)
+    return positions
+
+
+# searches every book position to depth and returns the sorted (key , score , column) records
+def build_book(plies, depth, progress=None):
+    table = TranspositionTable(TABLE_SIZE_MB)
+    records = []
+    for key, (state, mirrored) in book_positions(plies).items():
+        search = Search(state, IncrementalEvaluator.from_state(state), table)
+        utility, col = search.alpha_beta(depth)
+        if mirrored:
+            col = state.config.mirror_col(col)
+        records.append((key, utility, col))
+        if progress is not None:
+            progress(len(records))
+    records.sort()
+    return records
+
+
+# the checksum of the evaluation the scores of a book come from , the book is searched with the default weights
+# and a book scored by another evaluation is refused when it is opened
+def evaluation_checksum(weights):
+    return zlib.crc32(evaluation_version(weights).encode())
+
+
+def write_book(records, depth, filename):
+    with open(filename, "wb") as output:
+        output.write(HEADER.pack(MAGIC, VERSION, depth, len(records), evaluation_checksum(DEFAULT_WEIGHTS)))
+        for record in records:
+            output.write(RECORD.pack(*record))
+
+
+# a book file mapped into memory , the pages are shared by every process that opens the same file
+class OpeningBook:
+    def __init__(self, filename):
+        with open(filename, "rb") as book_file:
+            self.data = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.depth, self.count, checksum = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.data.close()
+            raise ValueError("%s is not a version %d opening book" % (filename, VERSION))
+        if checksum != evaluation_checksum(DEFAULT_WEIGHTS):
+            self.data.close()
+            raise ValueError("%s was scored by another evaluation , rebuild it" % filename)
+        if len(self.data) != HEADER.size + self.count * RECORD.size:
+            self.data.close()
+            raise ValueError("%s is truncated" % filename)
+        self.hits = 0
+        self.probes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.data.close()
+
+    def __len__(self):
+        return self.count
+
+    # the (column , score) stored for the AI in the given state , or None when the position is not in the book
+    def probe(self, state):
+        self.probes += 1
+        if state.config is not DEFAULT_CONFIG:
+            return None
+        key, mirrored = canonical_key(state)
+        low = 0
+        high = self.count
+        while low < high:
+            middle = (low + high) // 2
+            middle_key, utility, col = RECORD.unpack_from(self.data, HEADER.size + middle * RECORD.size)
+            if middle_key < key:
+                low = middle + 1
+            elif middle_key > key:
+                high = middle
+            else:
+                self.hits += 1
+                if mirrored:
+                    col = state.config.mirror_col(col)
+                return col, utility
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Builds the opening book file.")
+    parser.add_argument("--plies", type=int, default=4, help="positions with at most this many coins are stored")
+    parser.add_argument("--depth", type=int, default=8, help="alpha-beta depth every position is searched to")
+    parser.add_argument("--output", default="book.bin")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+
+    def progress(done):
+        if done % 100 == 0:
+            print("%d positions searched in %.1f s" % (done, time.perf_counter() - start), file=sys.stderr)
+
+    records = build_book(args.plies, args.depth, progress)
+    write_book(records, args.depth, args.output)
+    print("%d positions written to %s in %.1f s" % (len(records), args.output, time.perf_counter() - start),
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# persistent cache of searched positions : the depth , score and best AI move of every root position the engine
+# searched , kept across moves , games and processes
+#
+# two tiers : a least recently used dict in memory in front of a SQLite file on disk , a probe that misses the
+# memory tier reads the file and keeps the entry in memory , new entries are written to the file in batches
+# every flush_entries stores or flush_interval_s seconds and when the cache is closed
+# the most recently used entries of the file are loaded into memory when the cache is opened
+#
+# every entry is stored under a version made of the evaluation weights , so retuning the weights makes the old
+# entries invisible , and under the board size , a stale version is never read and is evicted first since it is
+# never used again
+# the memory tier holds at most memory_entries entries and the file at most disk_entries , the least recently
+# used are evicted , in the file an entry counts as used when it was last written
+# positions are stored once for a position and its left-right mirror like the opening book , see book.canonical_key
+#
+# several processes can open the same file , SQLite serializes their writes
+import math
+import sqlite3
+import time
+from collections import OrderedDict
+from book import canonical_key
+from evaluation import DEFAULT_WEIGHTS, evaluation_version
+
+# changed when the layout of the stored entries changes , part of every version
+FORMAT = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    version TEXT NOT NULL,
+    board TEXT NOT NULL,
+    key BLOB NOT NULL,
+    depth INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    move INTEGER NOT NULL,
+    used REAL NOT NULL,
+    PRIMARY KEY (version, board, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS positions_used ON positions (used);
+"""
+
+# a search at least as deep as the stored one replaces it , a shallower one leaves it as it is
+UPSERT = """
+INSERT INTO positions (version, board, key, depth, score, move, used) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (version, board, key) DO UPDATE SET
+    depth = excluded.depth, score = excluded.score, move = excluded.move, used = excluded.used
+    WHERE excluded.depth >= positions.depth
+"""
+
+# the counters of stats , the sums of several caches add them up , see merge_stats
+# an entry found but searched less deep than the probe needs counts as a hit of its tier and as shallow
+COUNTERS = ("probes", "memory_hits", "disk_hits", "misses", "shallow", "stores", "flushes", "memory_evictions",
+            "disk_evictions", "memory_seconds", "disk_seconds", "flush_seconds")
+
+
+# the version of the entries searched with the given weights , see evaluation.evaluation_version
+def weights_version(weights):
+    return "%d:%s" % (FORMAT, evaluation_version(weights))
+
+
+# the name of a board size in the file
+def board_name(config):
+    return "%dx%d/%d" % (config.rows, config.columns, config.connect)
+
+
+# the exact key of a position as bytes , the keys of large boards do not fit in a SQLite integer
+def key_bytes(key):
+    return key.to_bytes((key.bit_length() + 7) // 8, "little")
+
+
+class PositionCache:
+    def __init__(self, path, weights=DEFAULT_WEIGHTS, memory_entries=100000, disk_entries=1000000,
+                 flush_entries=1000, flush_interval_s=10.0):
+        self.version = weights_version(weights)
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.flush_entries = flush_entries
+        self.flush_interval_s = flush_interval_s
+        # (board , key) -> (depth , score , move) , the most recently used entry last
+        self.entries = OrderedDict()
+        # the entries stored since the last flush , written to the file by the next one
+        self.dirty = {}
+        self.last_flush = time.monotonic()
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        # the depth the last time-budgeted search of the engine got to , such a search takes the entries at least
+        # this deep , no entry is deep enough before the first one
+        self.budget_depth = math.inf
+        self.connection = sqlite3.connect(path, timeout=30)
+        # readers of other processes do not block the writer and the writer does not block them
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        self.load()
+
+    # fills the memory tier with the most recently used entries of the file
+    def load(self):
+        rows = self.connection.execute(
+            "SELECT board, key, depth, score, move FROM positions WHERE version = ? ORDER BY used DESC LIMIT ?",
+            (self.version, self.memory_entries)).fetchall()
+        for board, key, depth, score, move in reversed(rows):
+            self.entries[board, key] = (depth, score, move)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    # the stored (depth , score , column) of the position searched to at least depth with the AI to move , or None
+    # the depth needed is at most the number of empty cells , a search to the end of the game answers every depth
+    def probe(self, state, depth):
+        start = time.perf_counter()
+        self.counts["probes"] += 1
+        key, mirrored = canonical_key(state)
+        entry_key = (board_name(state.config), key_bytes(key))
+        entry = self.entries.get(entry_key)
+        if entry is not None:
+            self.entries.move_to_end(entry_key)
+            self.counts["memory_hits"] += 1
+            self.counts["memory_seconds"] += time.perf_counter() - start
+        else:
+            row = self.connection.execute(
+                "SELECT depth, score, move FROM positions WHERE version = ? AND board = ? AND key = ?",
+                (self.version,) + entry_key).fetchone()
+            self.counts["disk_seconds"] += time.perf_counter() - start
+            if row is None:
+                self.counts["misses"] += 1
+                return None
+            self.counts["disk_hits"] += 1
+            entry = tuple(row)
+            self.remember(entry_key, entry)
+        stored_depth, score, move = entry
+        if stored_depth < min(depth, state.config.cells - state.moves_played):
+            self.counts["shallow"] += 1
+            return None
+        if mirrored:
+            move = state.config.mirror_col(move)
+        return stored_depth, score, move
+
+    # keeps the result of a search of the position with the AI to move , a shallower result than the stored one
+    # is dropped
+    def store(self, state, depth, score, col):
+        self.counts["stores"] += 1
+        key, mirrored = canonical_key(state)
+        entry_key = (board_name(state.config), key_bytes(key))
+        entry = self.entries.get(entry_key)
+        if entry is not None and entry[0] > depth:
+            return
+        if mirrored:
+            col = state.config.mirror_col(col)
+        entry = (depth, score, col)
+        self.remember(entry_key, entry)
+        self.dirty[entry_key] = entry
+        if len(self.dirty) >= self.flush_entries or time.monotonic() - self.last_flush >= self.flush_interval_s:
+            self.flush()
+
+    # puts an entry in the memory tier and evicts the least recently used ones over the cap
+    def remember(self, entry_key, entry):
+        self.entries[entry_key] = entry
+        self.entries.move_to_end(entry_key)
+        while len(self.entries) > self.memory_entries:
+            self.entries.popitem(last=False)
+            self.counts["memory_evictions"] += 1
+
+    # writes the new entries to the file and evicts the least recently used entries over the cap
+    def flush(self):
+        self.last_flush = time.monotonic()
+        if not self.dirty:
+            return
+        start = time.perf_counter()
+        used = time.time()
+        with self.connection:
+            self.connection.executemany(UPSERT, [(self.version, board, key, depth, score, move, used)
+                                                 for (board, key), (depth, score, move) in self.dirty.items()])
+            count = self.connection.execute("SELECT count(*) FROM positions").fetchone()[0]
+            if count > self.disk_entries:
+                self.connection.execute(
+                    "DELETE FROM positions WHERE (version, board, key) IN "
+                    "(SELECT version, board, key FROM positions ORDER BY used LIMIT ?)", (count - self.disk_entries,))
+                self.counts["disk_evictions"] += count - self.disk_entries
+        self.dirty.clear()
+        self.counts["flushes"] += 1
+        self.counts["flush_seconds"] += time.perf_counter() - start
+
+    # the counters and the hit rate and mean latencies derived from them
+    def stats(self):
+        record = summarize(self.counts)
+        record["memory_entries"] = len(self.entries)
+        return record
+
+
+# hit rate and mean latencies of a set of counters
+def summarize(counts):
+    record = dict(counts)
+    hits = counts["memory_hits"] + counts["disk_hits"] - counts["shallow"]
+    disk_probes = counts["disk_hits"] + counts["misses"]
+    record["hit_rate"] = hits / counts["probes"] if counts["probes"] else 0.0
+    record["memory_probe_us"] = counts["memory_seconds"] / counts["memory_hits"] * 1e6 if counts["memory_hits"] else 0.0
+    record["disk_probe_us"] = counts["disk_seconds"] / disk_probes * 1e6 if disk_probes else 0.0
+    record["flush_ms"] = counts["flush_seconds"] / counts["flushes"] * 1000 if counts["flushes"] else 0.0
+    return record
+
+
+# the stats of several caches , like the caches of the worker processes of the server , as one record
+def merge_stats(records):
+    counts = dict.fromkeys(COUNTERS, 0)
+    for record in records:
+        for name in COUNTERS:
+            counts[name] += record[name]
+    merged = summarize(counts)
+    merged["memory_entries"] = sum(record["memory_entries"] for record in records)
+    return merged
@@ -0,0 +1,600 @@
+import math
+import time
+from bitboard import BitBoard, PLAYER_VALUE, AI_VALUE, EMPTY, DEFAULT_CONFIG
+from evaluation import IncrementalEvaluator, evaluate_batch, boards_from_bitboards, terminal_score, position_score
+from evaluation import DEFAULT_WEIGHTS
+from transposition import NO_MOVE, bound_type, table_key, table_move
+from search import Search
+
+# the game engine without any GUI , importing it has no side effects
+# numpy , graphviz and the process pool of the parallel search are only loaded when they are used
+
+# max search depth , equals number of levels , equals number of edges from root to leaf
+DEPTH_CUTOFF = 3
+GRAPH_DEPTH_CUTOFF = 3
+# most nodes written to an exported game tree
+GRAPH_MAX_NODES = 2000
+
+# memory cap of the alpha-beta transposition table in MB
+TABLE_SIZE_MB = 16
+
+# time budget of every AI move in milliseconds , alpha-beta deepens the search until it runs out
+MOVE_TIME_MS = 1000
+# deepest iteration of the iterative deepening search
+MAX_SEARCH_DEPTH = 20
+
+# fixed depth of the parallel search
+PARALLEL_DEPTH = 8
+
+# To choose the player turn , player or ai
+PLAYER = 0
+AI = 1
+
+# most playouts of a Monte Carlo search , MOVE_TIME_MS usually stops it first
+MCTS_PLAYOUTS = 200000
+
+# the AI algorithms
+MINIMAX = 0
+ALPHA_BETA = 1
+MCTS = 2
+
+# the children of every leaf of a tree , a list is only made for the nodes that are expanded
+NO_CHILDREN = ()
+
+
+# a node of the game tree , slots keep the nodes small since a retained tree holds thousands of them
+# the nodes generated inside a tree keep only their bitboard state , their leaf score is computed when they are
+# generated and their evaluator is rebuilt from the state in the rare case they are expanded or played from
+class C4Puzzle:
+    __slots__ = ("state", "evaluator", "children", "parent", "backed_up_score", "prev_col", "static_score")
+
+    # a new game is played on the board of config , see bitboard.board_config , a given state brings its own
+    def __init__(self, state=None, evaluator=None, config=DEFAULT_CONFIG):
+        # the bitboard game state , see bitboard.py
+        self.state = state if state is not None else BitBoard(config)
+        # the running window scores of the state , see evaluation.py , None for the nodes generated in a tree
+        self.evaluator = evaluator if evaluator is not None else IncrementalEvaluator.from_state(self.state)
+        self.children = []
+        self.parent = None
+        # used by minimax algorithm to back up the best minimax value to the parent node
+        self.backed_up_score = -1
+        # the column that generated the current board configuration
+        self.prev_col = 0
+        # the score of the position as a leaf , see evaluation.position_score , None until it is computed
+        self.static_score = None
+
+    # the board in the numpy layout , rebuilt from the bitboard on every access
+    @property
+    def board(self):
+        return self.state.to_numpy()
+
+    # attribute is the value of the coin inside the board ; PLAYER_VALUE or AI_VALUE or EMPTY
+    def drop_coin(self, col, attribute):
+        # check if it is possible to drop a piece in the specified column
+        if self.state.can_play(col):
+            row = self.state.make_move(col, attribute)
+            if self.evaluator is not None:
+                self.evaluator.add(row, col, attribute)
+            self.static_score = None
+            return False, row
+        # return true if failed to drop a coin
+        # returns the row in which the coin was dropped to be used in other functions
+        return True, 0
+
+    # the evaluator of the node , built from the state for the nodes generated in a tree with the weights of the
+    # evaluator of the nearest node above it
+    def node_evaluator(self):
+        if self.evaluator is None:
+            node = self.parent
+            while node is not None and node.evaluator is None:
+                node = node.parent
+            weights = node.evaluator.weights if node is not None else DEFAULT_WEIGHTS
+            return IncrementalEvaluator.from_state(self.state, weights)
+        return self.evaluator
+
+    # attribute is the value of the coin inside the board ; PLAYER_VALUE or AI_VALUE or EMPTY
+    # the children get no evaluator of their own , the coin is added to the evaluator of this node
+    # to score each child and taken back
+    def generate_children(self, attribute):
+        evaluator = self.node_evaluator()
+        children = list(self.children)
+        for col in self.state.valid_columns():
+            # create the child by dropping a coin in a copy of the bitboard
+            new_state = self.state.copy()
+            row = new_state.make_move(col, attribute)
+            new_node = C4Puzzle.__new__(C4Puzzle)
+            new_node.state = new_state
+            new_node.evaluator = None
+            new_node.children = NO_CHILDREN
+            new_node.parent = self
+            new_node.backed_up_score = -1
+            new_node.prev_col = col
+            evaluator.add(row, col, attribute)
+            new_node.static_score = position_score(new_state, evaluator)
+            evaluator.remove(row, col, attribute)
+            children.append(new_node)
+        self.children = children
+
+    def create_tree(self, depth, turn, stats=None):
+        if depth > 0:
+            if turn == PLAYER:
+                # check if the node have no children to avoid the recreation of the same children
+                if not len(self.children):
+                    self.timed_generate_children(PLAYER_VALUE, stats)
+                # for each child , recursively create the children
+                for child in self.children:
+                    child.create_tree(depth - 1, AI, stats)
+            else:
+                # check if the node have no children to avoid the recreation of the same children
+                if not len(self.children):
+                    self.timed_generate_children(AI_VALUE, stats)
+                    # for each child , recursively create the children
+                for child in self.children:
+                    child.create_tree(depth - 1, PLAYER, stats)
+
+    # generate_children , timed when stats are recorded
+    def timed_generate_children(self, attribute, stats):
+        if stats is None:
+            self.generate_children(attribute)
+        else:
+            with stats.timer("generate_children"):
+                self.generate_children(attribute)
+
+    # counts how many connections in a given board
+    def connections_count(self, attribute):
+        return self.state.connections_count(attribute)
+
+    # used by minimax algorithm , finds the maximum score among all children
+    # the root is expanded even when the game is decided so a child is always chosen
+    def maximize(self, scored_leaves=False, stats=None, root=False):
+        if stats is not None:
+            stats.count_node(self.state.moves_played - stats.root_ply)
+        # if a leaf node or a decided game , calculate the score and return it
+        # the score was already set by score_leaves when the leaves were scored in a batch
+        if self.is_leaf() and not (root and self.children):
+            if not scored_leaves:
+                self.backed_up_score = self.leaf_score(stats)
+            return None, self.backed_up_score
+
+        max_child = None
+        max_utility = -math.inf
+
+        # the next turn is the PLAYER turn , then we call minimize function so that
+        # PLAYER chooses the minimum score among all children
+        for child in self.children:
+            new_child, utility = child.minimize(scored_leaves, stats)
+
+            # if a higher score is found among children , set it as the best child
+            if utility > max_utility:
+                max_child = child
+                max_utility = utility
+                self.backed_up_score = utility
+
+        return max_child, max_utility
+
+    # used by minimax algorithm , finds the minimum score among all children
+    def minimize(self, scored_leaves=False, stats=None):
+        if stats is not None:
+            stats.count_node(self.state.moves_played - stats.root_ply)
+        # if a leaf node or a decided game , calculate the score and return it
+        # the score was already set by score_leaves when the leaves were scored in a batch
+        if self.is_leaf():
+            if not scored_leaves:
+                self.backed_up_score = self.leaf_score(stats)
+            return None, self.backed_up_score
+
+        min_child = None
+        min_utility = math.inf
+
+        # the next turn is the AI turn , then we call maximize function so that
+        # AI chooses the maximum score among all children
+        for child in self.children:
+            new_child, utility = child.maximize(scored_leaves, stats)
+
+            # if a lower score is found among children , set it as the best child
+            if utility < min_utility:
+                min_child = child
+                min_utility = utility
+                self.backed_up_score = utility
+
+        return min_child, min_utility
+
+    # minimax algorithm , starts by maximizing the children
+    # with batch the leaves are scored together by score_leaves first
+    # with stats the nodes , leaves and timings of the search are recorded in the SearchStats
+    def minimax(self, batch=False, stats=None):
+        if stats is None:
+            if batch:
+                self.score_leaves(AI_VALUE)
+            child, utility = self.maximize(batch, root=True)
+            return child
+        stats.root_ply = self.state.moves_played
+        stats.depth_reached = self.height()
+        with stats.timer("search"):
+            if batch:
+                with stats.timer("evaluate"):
+                    self.score_leaves(AI_VALUE)
+            child, utility = self.maximize(batch, stats, True)
+        return child
+
+    # used by alpha-beta pruning algorithm , finds the maximum score among all children
+    # depth is the number of levels below the node , used to check the entries of the transposition table
+    # the root is expanded even when the game is decided so a child is always chosen
+    # the children are tried best first by the scores of the last search that reached them
+    # the root only takes its first move from the table and is always searched , so every child of the kept tree
+    # gets a score of this search
+    def alpha_beta_maximize(self, alpha, beta, scored_leaves=False, table=None, depth=0, stats=None, root=False):
+        if stats is not None:
+            stats.count_node(self.state.moves_played - stats.root_ply)
+        if self.is_leaf() and not (root and self.children):
+            # if a leaf node or a decided game , calculate the score and return it
+            if not scored_leaves:
+                self.backed_up_score = self.leaf_score(stats)
+            return None, self.backed_up_score
+
+        children = self.ordered_children(True)
+        if table is not None:
+            key, mirrored = table_key(self.state, True)
+            alpha_before, beta_before = alpha, beta
+            if root:
+                move = table_move(table.best_move(key), mirrored, self.state.config)
+                children = sorted(children, key=lambda node: node.prev_col != move)
+                cached_child = None
+            else:
+                cached_child, utility, alpha, beta, children = self.probe_table(table, key, mirrored, depth, alpha,
+                                                                                beta, children)
+            if cached_child is not None:
+                if stats is not None:
+                    stats.table_cutoffs += 1
+                return cached_child, utility
+
+        max_child = None
+        max_utility = -math.inf
+
+        # the next turn is the PLAYER turn , then we call minimize function so that
+        # PLAYER chooses the minimum score among all children
+        for child in children:
+            new_child, utility = child.alpha_beta_minimize(alpha, beta, scored_leaves, table, depth - 1, stats)
+            # if a higher score is found among children , set it as the best child
+            if utility > max_utility:
+                max_child = child
+                max_utility = utility
+                self.backed_up_score = utility
+
+            # prune the whole branch
+            if max_utility >= beta:
+                if stats is not None:
+                    stats.beta_cutoffs += 1
+                break
+
+            if max_utility > alpha:
+                alpha = max_utility
+
+        if table is not None:
+            table.store(key, depth, max_utility, bound_type(max_utility, alpha_before, beta_before),
+                        table_move(max_child.prev_col, mirrored, self.state.config))
+        return max_child, max_utility
+
+    # used by alpha-beta pruning algorithm , finds the minimum score among all children
+    def alpha_beta_minimize(self, alpha, beta, scored_leaves=False, table=None, depth=0, stats=None):
+        if stats is not None:
+            stats.count_node(self.state.moves_played - stats.root_ply)
+        # if a leaf node or a decided game , calculate the score and return it
+        if self.is_leaf():
+            if not scored_leaves:
+                self.backed_up_score = self.leaf_score(stats)
+            return None, self.backed_up_score
+
+        children = self.ordered_children(False)
+        if table is not None:
+            key, mirrored = table_key(self.state, False)
+            alpha_before, beta_before = alpha, beta
+            cached_child, utility, alpha, beta, children = self.probe_table(table, key, mirrored, depth, alpha, beta,
+                                                                            children)
+            if cached_child is not None:
+                if stats is not None:
+                    stats.table_cutoffs += 1
+                return cached_child, utility
+
+        min_child = None
+        min_utility = math.inf
+
+        # the next turn is the AI turn , then we call maximize function so that
+        # AI chooses the maximum score among all children
+        for child in children:
+            new_child, utility = child.alpha_beta_maximize(alpha, beta, scored_leaves, table, depth - 1, stats)
+
+            # if a lower score is found among children , set it as the best child
+            if utility < min_utility:
+                min_child = child
+                min_utility = utility
+                self.backed_up_score = utility
+
+            # prune the whole branch
+            if min_utility <= alpha:
+                if stats is not None:
+                    stats.alpha_cutoffs += 1
+                break
+
+            if min_utility < beta:
+                beta = min_utility
+
+        if table is not None:
+            table.store(key, depth, min_utility, bound_type(min_utility, alpha_before, beta_before),
+                        table_move(min_child.prev_col, mirrored, self.state.config))
+        return min_child, min_utility
+
+    # looks the node up in the transposition table , returns (child , score , alpha , beta , children)
+    # where child is not None when the stored score decides the node without searching it ,
+    # children are ordered with the stored best move first , mirrored is the second value of table_key
+    def probe_table(self, table, key, mirrored, depth, alpha, beta, children):
+        utility, alpha, beta, move = table.probe_window(key, depth, alpha, beta)
+        move = table_move(move, mirrored, self.state.config)
+        children = sorted(children, key=lambda node: node.prev_col != move)
+        if utility is not None and children[0].prev_col == move:
+            self.backed_up_score = utility
+            return children[0], utility, alpha, beta, children
+        return None, utility, alpha, beta, children
+
+    # the children sorted by their backed up score , highest first when reverse is set
+    # a tree kept from the previous move still holds the scores of that search , new nodes keep their column order
+    def ordered_children(self, reverse):
+        return sorted(self.children, key=lambda node: node.backed_up_score, reverse=reverse)
+
+    # number of levels below the node
+    def height(self):
+        depth = 0
+        node = self
+        while node.children:
+            node = node.children[0]
+            depth += 1
+        return depth
+
+    # alpha-beta pruning algorithm , starts by maximizing the children
+    # with batch the leaves are scored together by score_leaves first ,
+    # with a table the scores of positions reached by different move orders are reused
+    def alpha_beta(self, alpha, beta, batch=False, table=None, stats=None):
+        if stats is None:
+            if batch:
+                self.score_leaves(AI_VALUE)
+            child, utility = self.alpha_beta_maximize(alpha, beta, batch, table, self.height(), root=True)
+            return child
+        stats.root_ply = self.state.moves_played
+        stats.depth_reached = self.height()
+        with stats.timer("search"):
+            if batch:
+                with stats.timer("evaluate"):
+                    self.score_leaves(AI_VALUE)
+            child, utility = self.alpha_beta_maximize(alpha, beta, batch, table, stats.depth_reached, stats, True)
+        return child
+
+    # true when the search stops at this node : it has no children or the result of the game is decided
+    def is_leaf(self):
+        return not self.children or self.state.decided_lead() is not None
+
+    # collects the leaves of the tree and sets their backed up score with one vectorized evaluation ,
+    # the score of piece minus the score of the other side like position_score
+    def score_leaves(self, piece):
+        leaves = []
+        # the root is always expanded , see maximize
+        stack = list(self.children) or [self]
+        while stack:
+            node = stack.pop()
+            if node.is_leaf():
+                leaves.append(node)
+            else:
+                stack.extend(node.children)
+        config = self.state.config
+        boards = boards_from_bitboards([leaf.state.player_bits for leaf in leaves],
+                                       [leaf.state.ai_bits for leaf in leaves], config)
+        weights = self.node_evaluator().weights
+        scores = evaluate_batch(boards, piece, config, weights) - evaluate_batch(boards, -piece, config, weights)
+        for leaf, score in zip(leaves, scores.tolist()):
+            terminal = terminal_score(leaf.state)
+            leaf.backed_up_score = score if terminal is None else terminal * -piece
+
+    # the score of all the windows of the board , kept up to date by the incremental evaluator
+    def evaluate_windows(self, piece):
+        return self.node_evaluator().score(piece)
+
+    # the score of the node as a leaf of the search , counted and timed when stats are recorded
+    # generated nodes were scored when they were created
+    def leaf_score(self, stats):
+        if stats is None:
+            if self.static_score is None:
+                self.static_score = position_score(self.state, self.node_evaluator())
+            return self.static_score
+        stats.leaves += 1
+        with stats.timer("evaluate"):
+            if self.static_score is None:
+                self.static_score = position_score(self.state, self.node_evaluator())
+            return self.static_score
+
+    # depth-first search from this node without building the tree , returns the best column and its score
+    # the node itself is not changed , the search plays and takes back moves on copies of its state
+    # with budget_ms alpha-beta deepens iteratively up to depth until the time budget runs out ,
+    # with a ParallelSearch pool alpha-beta splits the root moves across its worker processes ,
+    # with stats the nodes , cutoffs and timings of the search are recorded in the SearchStats ,
+    # with an OpeningBook alpha-beta only searches the positions that are not in the book
+    # with a PositionCache alpha-beta takes the positions searched deep enough before , in this game or an earlier
+    # one , and keeps the result of every search in it , see cache.py
+    # MCTS takes depth as its number of playouts , see monte_carlo
+    def search(self, depth, algorithm, table=None, budget_ms=None, pool=None, stats=None, book=None, cache=None):
+        if algorithm == MCTS:
+            return self.monte_carlo(depth, budget_ms, pool, stats)
+        if book is not None and algorithm == ALPHA_BETA:
+            entry = book.probe(self.state)
+            if entry is not None:
+                if stats is not None:
+                    stats.depth_reached = book.depth
+                return entry
+        if cache is not None and algorithm == ALPHA_BETA:
+            # a time-budgeted search takes the positions searched as deep as its budget got the last time
+            entry = cache.probe(self.state, depth if budget_ms is None else min(depth, cache.budget_depth))
+            if entry is not None:
+                if stats is not None:
+                    stats.depth_reached = entry[0]
+                return entry[2], entry[1]
+        search = Search(self.state.copy(), self.node_evaluator().copy(), table, stats)
+        start = time.perf_counter()
+        reached_depth = depth
+        if algorithm == MINIMAX:
+            utility, col = search.minimax(depth)
+        elif pool is not None:
+            utility, col = pool.alpha_beta(self.state, depth)
+            if stats is not None:
+                # the workers do not record per ply , only the total is known
+                stats.add_nodes(0, pool.nodes)
+                stats.depth_reached = depth
+        elif budget_ms is not None:
+            utility, col, reached_depth = search.iterative_deepening(budget_ms, depth)
+        else:
+            utility, col = search.alpha_beta(depth)
+        if stats is not None:
+            stats.add_time("search", time.perf_counter() - start)
+        if cache is not None and algorithm == ALPHA_BETA and col != NO_MOVE:
+            cache.store(self.state, reached_depth, utility, col)
+            # a search that got to the end of the game says nothing about how deep the budget gets
+            if budget_ms is not None and reached_depth < self.state.config.cells - self.state.moves_played:
+                cache.budget_depth = reached_depth
+        return col, utility
+
+    # Monte Carlo tree search from this node , returns the most visited column and the AI reward expected after it ,
+    # between 0 for a loss and 1 for a win , see mcts.py
+    # it stops after playouts playouts or when budget_ms runs out , with a ParallelSearch pool every worker grows
+    # its own tree and the root moves of the trees are merged
+    def monte_carlo(self, playouts, budget_ms=None, pool=None, stats=None):
+        from mcts import MonteCarloSearch
+        start = time.perf_counter()
+        if pool is not None:
+            utility, col = pool.mcts(self.state, playouts, budget_ms)
+            if stats is not None:
+                # the workers only send back the root moves , only the playouts are known
+                stats.leaves += pool.nodes
+        else:
+            utility, col = MonteCarloSearch(self.state.copy(), stats=stats).search(playouts, budget_ms)
+        if stats is not None:
+            stats.add_time("search", time.perf_counter() - start)
+        return col, utility
+
+    # returns a new node for the position after dropping a coin in col , the node keeps no parent
+    # so the positions before it can be freed
+    def play(self, col, attribute):
+        new_node = C4Puzzle(self.state.copy(), self.node_evaluator().copy())
+        new_node.drop_coin(col, attribute)
+        new_node.prev_col = col
+        return new_node
+
+    # cuts the node from its parent and its siblings , the rest of the old tree is freed
+    # while the tree below the node is kept for the next search
+    # the node the game continues from plays its moves with a running evaluator again
+    def detach(self):
+        self.evaluator = self.node_evaluator()
+        if self.parent is not None:
+            for sibling in self.parent.children:
+                if sibling is not self:
+                    sibling.release()
+            self.parent.children = []
+            self.parent = None
+
+    # unlinks a discarded subtree , the parent links make cycles that only the garbage collector would free ,
+    # without them the nodes are freed as soon as they are dropped
+    def release(self):
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            stack.extend(node.children)
+            node.children = []
+            node.parent = None
+
+    # the node after dropping a coin in col : the child already in the tree with its subtree ,
+    # or a new node when the move was not generated , the node is detached from this node
+    def advance(self, col, attribute):
+        for child in self.children:
+            if child.prev_col == col:
+                break
+        else:
+            child = self.play(col, attribute)
+        child.detach()
+        self.children = []
+        return child
+
+    # check if the board is full , the end condition of the game
+    def is_full(self):
+        return self.state.is_full()
+
+    def print_board(self):
+        import numpy
+        print(numpy.flip(self.board, 0))
+
+    # adds the tree below this node to a graphviz graph , up to depth levels and max_nodes nodes
+    def create_graph(self, graph, chosen_node, depth=GRAPH_DEPTH_CUTOFF, max_nodes=None):
+        from export import NODE, iter_tree
+        for event in iter_tree(self, chosen_node, depth, max_nodes):
+            if event[0] == NODE:
+                _, node_id, label, chosen = event
+                if chosen:
+                    graph.node(node_id, label, style="filled", fillcolor="red")
+                else:
+                    graph.node(node_id, label)
+            else:
+                graph.edge(event[1], event[2])
+
+
+# plays the AI move in the position of root and returns the node of the new position
+# minimax searches to DEPTH_CUTOFF , alpha-beta searches in the pool at PARALLEL_DEPTH when one is given ,
+# otherwise as deep as MOVE_TIME_MS allows , MCTS plays out as many games as MOVE_TIME_MS allows
+# in this process or in every worker of the pool
+# with retain_tree the game tree is built so it can be exported , the returned node keeps its parent until detach
+# is called , create_tree only generates the levels below the part of the tree kept from the last move ,
+# MCTS builds no minimax tree and ignores retain_tree , the kept tree is searched without the table so every
+# score in the export comes from this search and not from a cutoff on an entry of an earlier one
+# with stats the work done for the move is recorded in the SearchStats
+# with an OpeningBook the depth-first alpha-beta plays the book move of the positions it holds ,
+# with a PositionCache it plays the cached move of the positions searched deep enough before
+def ai_move(root, algorithm, table=None, pool=None, retain_tree=False, batch=False, stats=None, book=None,
+            cache=None):
+    if retain_tree and algorithm != MCTS:
+        # create the game tree and get the best child
+        root.create_tree(DEPTH_CUTOFF, AI, stats)
+        if algorithm == MINIMAX:
+            return root.minimax(batch, stats)
+        return root.alpha_beta(-math.inf, math.inf, batch, stats=stats)
+
+    # search depth-first and only keep the chosen position
+    if algorithm == MINIMAX:
+        col, utility = root.search(DEPTH_CUTOFF, algorithm, stats=stats)
+    elif algorithm == MCTS:
+        col, utility = root.search(MCTS_PLAYOUTS, algorithm, budget_ms=MOVE_TIME_MS, pool=pool, stats=stats)
+    elif pool is not None:
+        col, utility = root.search(PARALLEL_DEPTH, algorithm, pool=pool, stats=stats, book=book, cache=cache)
+    else:
+        col, utility = root.search(MAX_SEARCH_DEPTH, algorithm, table, MOVE_TIME_MS, stats=stats, book=book,
+                                   cache=cache)
+    return root.play(col, AI_VALUE)
+
+
+# graph the game tree searched for the move that led to chosen_node and render it with graphviz
+# with an exporter the tree is only read here and written and rendered on its background thread ,
+# see export.py , otherwise the call blocks until the render is done
+def render_graph(chosen_node, filename='G.gv', stats=None, exporter=None):
+    start = time.perf_counter()
+    if exporter is not None:
+        exporter.submit(chosen_node.parent, chosen_node)
+    else:
+        from export import export_tree, iter_tree
+        events = iter_tree(chosen_node.parent, chosen_node, GRAPH_DEPTH_CUTOFF, GRAPH_MAX_NODES)
+        export_tree(events, filename, "dot", render=True)
+    if stats is not None:
+        stats.add_time("graph_export", time.perf_counter() - start)
+
+
+# the winner of a full board , PLAYER_VALUE or AI_VALUE , or EMPTY for a draw
+def winner(node):
+    player_count = node.connections_count(PLAYER_VALUE)
+    ai_count = node.connections_count(AI_VALUE)
+    if player_count > ai_count:
+        return PLAYER_VALUE
+    if ai_count > player_count:
+        return AI_VALUE
+    return EMPTY
@@ -0,0 +1,317 @@
+import collections
+import functools
+from bitboard import PLAYER_VALUE, AI_VALUE, EMPTY, CONNECT_COUNT, DEFAULT_CONFIG
+
+# score of a window holding connect , connect - 1 or connect - 2 coins of a side and no coin of the other side ,
+# on the default board the windows of 4 , 3 and 2 coins
+FOUR_SCORE = 10000
+THREE_SCORE = 900
+TWO_SCORE = 40
+# score of every coin in the center column , or in the two middle columns of a board with an even number of
+# columns so the evaluation stays the same for a position and its mirror
+CENTER_SCORE = 2
+# score of every connection of lead in a decided game , above any difference of window scores
+# so a decided game always counts more than an open one
+WIN_SCORE = 10 ** 7
+
+
+# every window of connect cells of the board as a tuple of (row , col) cells
+def generate_windows(config=DEFAULT_CONFIG):
+    rows, columns, connect = config.rows, config.columns, config.connect
+    last = connect - 1
+    windows = []
+    # Horizontal
+    for r in range(rows):
+        for c in range(columns - last):
+            windows.append(tuple((r, c + i) for i in range(connect)))
+    # Vertical
+    for c in range(columns):
+        for r in range(rows - last):
+            windows.append(tuple((r + i, c) for i in range(connect)))
+    # positive sloped diagonal
+    for r in range(rows - last):
+        for c in range(columns - last):
+            windows.append(tuple((r + i, c + i) for i in range(connect)))
+    # negatively sloped diagonal
+    for r in range(rows - last):
+        for c in range(columns - last):
+            windows.append(tuple((r + last - i, c + i) for i in range(connect)))
+    return windows
+
+
+# the windows of a board config , cell_windows[col][row] is the indices of the windows that contain that cell
+WindowTables = collections.namedtuple("WindowTables", "windows cell_windows center_columns")
+
+
+# the columns whose coins score CENTER_SCORE
+def center_columns(columns):
+    return tuple(sorted({(columns - 1) // 2, columns // 2}))
+
+
+# built once for every board config , every evaluator of that size shares them
+@functools.lru_cache(maxsize=None)
+def window_tables(config):
+    windows = generate_windows(config)
+    cell_windows = [[() for _ in range(config.rows)] for _ in range(config.columns)]
+    for index, window in enumerate(windows):
+        for row, col in window:
+            cell_windows[col][row] += (index,)
+    return WindowTables(windows, cell_windows, center_columns(config.columns))
+
+
+# the tunable evaluation weights : scores of windows with 4 , 3 and 2 coins of a side and of a center coin ,
+# with another connection length the windows with connect , connect - 1 and connect - 2 coins
+Weights = collections.namedtuple("Weights", "four three two center")
+DEFAULT_WEIGHTS = Weights(FOUR_SCORE, THREE_SCORE, TWO_SCORE, CENTER_SCORE)
+
+# changed whenever the meaning of a score changes , the scores kept outside the process are stored with it ,
+# see book.py and cache.py
+EVALUATION_VERSION = 2
+
+
+# names the evaluation a stored score comes from : the version and the weights
+def evaluation_version(weights=DEFAULT_WEIGHTS):
+    return "%d:%s" % (EVALUATION_VERSION, "/".join(str(weight) for weight in weights))
+
+
+# table[own][other] is the score of a window with own coins of a side and other coins of the opponent ,
+# built once for every set of weights and connection length
+@functools.lru_cache(maxsize=None)
+def window_scores(weights, connect=CONNECT_COUNT):
+    table = [[0] * (connect + 1) for _ in range(connect + 1)]
+    table[connect][0] = weights.four
+    table[connect - 1][0] = weights.three
+    table[connect - 2][0] = weights.two
+    return table
+
+
+# returns the score of a given window of connect cells
+def sum_window_score(window, piece, connect=CONNECT_COUNT):
+    score = 0
+    window = list(window)
+    if window.count(piece) == connect:
+        score += FOUR_SCORE
+    elif window.count(piece) == connect - 1 and window.count(EMPTY) == 1:
+        score += THREE_SCORE
+    elif window.count(piece) == connect - 2 and window.count(EMPTY) == 2:
+        score += TWO_SCORE
+    return score
+
+
+# given a board , evaluate_board generate all possible windows of connect cells and evaluate the score of each one
+# this is the full rescan of the board , IncrementalEvaluator must always give the same score
+def evaluate_board(board, piece, connect=CONNECT_COUNT):
+    import numpy
+    rows, columns = board.shape
+    last = connect - 1
+    centers = center_columns(columns)
+    score = 0
+    # Score Horizontal
+    for r in range(rows):
+        for c in range(columns - last):
+            window = board[r][c:c + connect]
+            score += sum_window_score(window, piece, connect)
+
+        if (r + 1 < rows) and (
+                (board[r + 1].size - numpy.count_nonzero(board[r + 1])) == columns):
+            break
+
+    # Score Vertical
+    for c in range(columns):
+        col_array = [board[i][c] for i in range(rows)]
+
+        # Score center column
+        if c in centers:
+            center_count = col_array.count(piece)
+            score += center_count * CENTER_SCORE
+
+        for r in range(rows - last):
+            window = col_array[r:r + connect]
+            score += sum_window_score(window, piece, connect)
+            if col_array[r + 1] == EMPTY:
+                break
+
+    # Score positive sloped diagonal
+    for r in range(rows - last):
+        for c in range(columns - last):
+            window = [board[r + i][c + i] for i in range(connect)]
+            score += sum_window_score(window, piece, connect)
+
+    # Score negatively sloped diagonal
+    for r in range(rows - last):
+        for c in range(columns - last):
+            window = [board[r + last - i][c + i] for i in range(connect)]
+            score += sum_window_score(window, piece, connect)
+
+    return score
+
+
+# keeps the coin count of both sides in every window and the running score of both sides ,
+# dropping or removing a coin only updates the windows that contain its cell
+# the windows skipped by the early exits of evaluate_board are always empty and score 0 ,
+# so summing every window gives exactly the same score
+# other weights than DEFAULT_WEIGHTS can be given to tune the evaluation , config is the BoardConfig of the states
+class IncrementalEvaluator:
+    __slots__ = ("player_counts", "ai_counts", "player_score", "ai_score", "player_center", "ai_center",
+                 "weights", "window_scores", "cell_windows", "center_columns")
+
+    def __init__(self, weights=DEFAULT_WEIGHTS, config=DEFAULT_CONFIG):
+        tables = window_tables(config)
+        self.weights = weights
+        self.window_scores = window_scores(weights, config.connect)
+        self.cell_windows = tables.cell_windows
+        self.center_columns = tables.center_columns
+        self.player_counts = [0] * len(tables.windows)
+        self.ai_counts = [0] * len(tables.windows)
+        self.player_score = 0
+        self.ai_score = 0
+        self.player_center = 0
+        self.ai_center = 0
+
+    def copy(self):
+        new_evaluator = IncrementalEvaluator.__new__(IncrementalEvaluator)
+        new_evaluator.player_counts = self.player_counts[:]
+        new_evaluator.ai_counts = self.ai_counts[:]
+        new_evaluator.player_score = self.player_score
+        new_evaluator.ai_score = self.ai_score
+        new_evaluator.player_center = self.player_center
+        new_evaluator.ai_center = self.ai_center
+        new_evaluator.weights = self.weights
+        new_evaluator.window_scores = self.window_scores
+        new_evaluator.cell_windows = self.cell_windows
+        new_evaluator.center_columns = self.center_columns
+        return new_evaluator
+
+    @classmethod
+    def from_state(cls, state, weights=DEFAULT_WEIGHTS):
+        evaluator = cls(weights, state.config)
+        for col, height in enumerate(state.heights):
+            for row in range(height):
+                evaluator.add(row, col, state.cell(row, col))
+        return evaluator
+
+    # a coin with the given value was dropped at (row , col)
+    def add(self, row, col, attribute):
+        if attribute == PLAYER_VALUE:
+            own_counts, other_counts = self.player_counts, self.ai_counts
+        else:
+            own_counts, other_counts = self.ai_counts, self.player_counts
+        table = self.window_scores
+        own_delta = 0
+        other_delta = 0
+        for index in self.cell_windows[col][row]:
+            own = own_counts[index]
+            other = other_counts[index]
+            own_delta += table[own + 1][other] - table[own][other]
+            other_delta += table[other][own + 1] - table[other][own]
+            own_counts[index] = own + 1
+        self.update(attribute, col, own_delta, other_delta, 1)
+
+    # the coin with the given value at (row , col) was taken back , undoes add
+    def remove(self, row, col, attribute):
+        if attribute == PLAYER_VALUE:
+            own_counts, other_counts = self.player_counts, self.ai_counts
+        else:
+            own_counts, other_counts = self.ai_counts, self.player_counts
+        table = self.window_scores
+        own_delta = 0
+        other_delta = 0
+        for index in self.cell_windows[col][row]:
+            own = own_counts[index]
+            other = other_counts[index]
+            own_delta += table[own - 1][other] - table[own][other]
+            other_delta += table[other][own - 1] - table[other][own]
+            own_counts[index] = own - 1
+        self.update(attribute, col, own_delta, other_delta, -1)
+
+    def update(self, attribute, col, own_delta, other_delta, center_delta):
+        if attribute == PLAYER_VALUE:
+            self.player_score += own_delta
+            self.ai_score += other_delta
+            if col in self.center_columns:
+                self.player_center += center_delta
+        else:
+            self.ai_score += own_delta
+            self.player_score += other_delta
+            if col in self.center_columns:
+                self.ai_center += center_delta
+
+    # the same score evaluate_board gives for the side playing with piece when the weights are the default ones
+    def score(self, piece):
+        if piece == PLAYER_VALUE:
+            return self.player_score + self.player_center * self.weights.center
+        if piece == AI_VALUE:
+            return self.ai_score + self.ai_center * self.weights.center
+        return 0
+
+
+# the score for the AI of a game whose result can no longer change , see BitBoard.decided_lead ,
+# exact for a full board , None while the game is open
+def terminal_score(state):
+    lead = state.decided_lead()
+    if lead is None:
+        return None
+    return lead * WIN_SCORE
+
+
+# the score of a position for the AI : terminal_score when the game is decided ,
+# otherwise the window score of the AI minus the window score of the player so the threats of both sides count
+def position_score(state, evaluator):
+    utility = terminal_score(state)
+    if utility is None:
+        return evaluator.score(AI_VALUE) - evaluator.score(PLAYER_VALUE)
+    return utility
+
+
+# the numpy tables of the batch evaluation of a board config , built on first use so importing this module
+# does not load numpy , returns (window_index , center_index , cell_bits) :
+#   window_index is the flat (row * columns + col) indices of the cells of every window , shape (windows , connect)
+#   cell_bits is the bitboard bit of every cell of the numpy layout , in row major order
+@functools.lru_cache(maxsize=None)
+def batch_tables(config):
+    import numpy
+    columns, connect = config.columns, config.connect
+    window_index = numpy.array([[row * columns + col for row, col in window]
+                                for window in window_tables(config).windows]).reshape(-1, connect)
+    center_index = numpy.array([row * columns + col for row in range(config.rows) for col in center_columns(columns)])
+    cell_bits = numpy.array([config.cell_bit(row, col) for row in range(config.rows) for col in range(columns)])
+    return window_index, center_index, cell_bits
+
+
+# window_scores as a numpy array for the batch evaluation , built once for every set of weights and connection length
+@functools.lru_cache(maxsize=None)
+def batch_scores(weights, connect=CONNECT_COUNT):
+    import numpy
+    return numpy.array(window_scores(weights, connect))
+
+
+# scores an (N , rows , columns) stack of boards in one pass , gives the same scores as an IncrementalEvaluator
+# with the same weights , and as evaluate_board with the default weights
+def evaluate_batch(boards, piece, config=DEFAULT_CONFIG, weights=DEFAULT_WEIGHTS):
+    import numpy
+    window_index, center_index, _ = batch_tables(config)
+    cells = boards.reshape(len(boards), config.cells)
+    windows = cells[:, window_index]
+    own = numpy.count_nonzero(windows == piece, axis=2)
+    other = numpy.count_nonzero(windows == -piece, axis=2)
+    scores = batch_scores(weights, config.connect)[own, other].sum(axis=1)
+    scores += numpy.count_nonzero(cells[:, center_index] == piece, axis=1) * weights.center
+    return scores
+
+
+# the bits of a list of bitboards as an (N , bits) array of 0 and 1 , bitboards of any size fit ,
+# boards larger than 64 bits do not fit in a numpy integer
+def unpack_bitboards(bitboards, config):
+    import numpy
+    size = (config.columns * config.column_height + 7) // 8
+    data = numpy.frombuffer(b"".join(bits.to_bytes(size, "little") for bits in bitboards), numpy.uint8)
+    return numpy.unpackbits(data.reshape(len(bitboards), size), axis=1, bitorder="little")
+
+
+# unpacks lists of player and ai bitboards into an (N , rows , columns) stack of boards
+def boards_from_bitboards(player_bits, ai_bits, config=DEFAULT_CONFIG):
+    cell_bits = batch_tables(config)[2]
+    player = unpack_bitboards(player_bits, config)[:, cell_bits]
+    ai = unpack_bitboards(ai_bits, config)[:, cell_bits]
+    boards = player.astype(int) * PLAYER_VALUE + ai.astype(int) * AI_VALUE
+    return boards.reshape(len(player_bits), config.rows, config.columns)
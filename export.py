@@ -0,0 +1,119 @@
+import json
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# export of the retained game tree , the nodes and edges are streamed by a generator so the output can be capped
+# by depth or node count , and the files are written and rendered by a background thread so the game never waits
+# for graphviz
+
+NODE = "node"
+EDGE = "edge"
+
+ROOT_ID = "root"
+ROOT_LABEL = "Max\nRoot"
+
+
+# yields the nodes and edges of the tree below root level by level , up to max_depth levels and max_nodes nodes
+#   (NODE , id , label , chosen)
+#   (EDGE , parent id , child id)
+# the labels are the ones create_graph has always drawn , the previous columns of a node are built from the ones
+# of its parent instead of walking up to the root for every node
+# the first level below the root is a Min level since the root is the AI position that was searched
+def iter_tree(root, chosen_node=None, max_depth=3, max_nodes=None):
+    yield NODE, ROOT_ID, ROOT_LABEL, root is chosen_node
+    count = 1
+    # every entry is (node , id , level , previous columns text for its children)
+    queue = deque([(root, ROOT_ID, 0, "")])
+    while queue:
+        node, node_id, level, previous = queue.popleft()
+        if level >= max_depth:
+            continue
+        kind = "Min" if level % 2 == 0 else "Max"
+        for child in node.children:
+            if max_nodes is not None and count >= max_nodes:
+                return
+            child_id = "n%d" % count
+            count += 1
+            label = "%s\nColumn %d \n%sScore = %s" % (kind, child.prev_col, previous, child.backed_up_score)
+            yield NODE, child_id, label, child is chosen_node
+            yield EDGE, node_id, child_id
+            queue.append((child, child_id, level + 1, "Previous Column %d \n" % child.prev_col + previous))
+
+
+def quote(text):
+    return '"%s"' % text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# writes the events as a graphviz DOT graph
+def write_dot(events, output):
+    output.write("digraph G {\n")
+    for event in events:
+        if event[0] == NODE:
+            _, node_id, label, chosen = event
+            style = ' style=filled fillcolor=red' if chosen else ''
+            output.write("\t%s [label=%s%s]\n" % (node_id, quote(label), style))
+        else:
+            output.write("\t%s -> %s\n" % (event[1], event[2]))
+    output.write("}\n")
+
+
+# writes the events as JSON lines , one node or edge per line
+def write_json(events, output):
+    for event in events:
+        if event[0] == NODE:
+            record = {"type": NODE, "id": event[1], "label": event[2], "chosen": event[3]}
+        else:
+            record = {"type": EDGE, "from": event[1], "to": event[2]}
+        output.write(json.dumps(record) + "\n")
+
+
+WRITERS = {"dot": write_dot, "json": write_json}
+
+
+# writes the tree to a file in the given format , and renders DOT files to PDF with graphviz when render is set
+def export_tree(events, filename, file_format="dot", render=False):
+    with open(filename, "w") as output:
+        WRITERS[file_format](events, output)
+    if render and file_format == "dot":
+        import graphviz
+        graphviz.render("dot", "pdf", filename)
+
+
+# writes and renders the exported trees on one background thread
+# the tree is read when submit is called , so the game can go on changing it while the files are written ,
+# when an export is still running the newest tree waits and older waiting ones are dropped
+class TreeExporter:
+    def __init__(self, filename="G.gv", file_format="dot", render=True, max_depth=3, max_nodes=2000):
+        self.filename = filename
+        self.file_format = file_format
+        self.render = render
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.lock = threading.Lock()
+        self.waiting = None
+        # the error of the last export that failed , rendering needs the graphviz executables
+        self.error = None
+
+    # reads the capped tree now and exports it in the background
+    def submit(self, root, chosen_node=None):
+        events = list(iter_tree(root, chosen_node, self.max_depth, self.max_nodes))
+        with self.lock:
+            scheduled = self.waiting is not None
+            self.waiting = events
+        if not scheduled:
+            self.executor.submit(self.run)
+
+    def run(self):
+        with self.lock:
+            events = self.waiting
+            self.waiting = None
+        try:
+            export_tree(events, self.filename, self.file_format, self.render)
+        except Exception as error:
+            self.error = error
+
+    # waits for the exports that were submitted
+    def close(self):
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,199 @@
+import math
+import random
+import time
+from bitboard import PLAYER_VALUE, AI_VALUE
+from transposition import NO_MOVE
+
+# exploration constant of the UCT formula , sqrt(2) is the usual value for rewards between 0 and 1
+EXPLORATION = math.sqrt(2)
+
+# the clock is only read every TIME_CHECK_PLAYOUTS playouts , must be a power of 2
+TIME_CHECK_PLAYOUTS = 64
+
+# the reward of a playout for a side : it won , it drew or it lost on connections
+WIN_REWARD = 1.0
+DRAW_REWARD = 0.5
+LOSS_REWARD = 0.0
+
+
+# the reward of the AI for a final or decided lead in connections
+def lead_reward(lead):
+    if lead > 0:
+        return WIN_REWARD
+    if lead < 0:
+        return LOSS_REWARD
+    return DRAW_REWARD
+
+
+# a node of the Monte Carlo tree , made the first time a playout leaves the tree through it
+# slots keep the nodes small since a search makes one per playout
+class MCTSNode:
+    __slots__ = ("col", "attribute", "parent", "children", "untried", "visits", "reward", "result")
+
+    def __init__(self, col, attribute, parent, untried, result):
+        # the column played to reach the node and the side that played it , reward counts for that side
+        self.col = col
+        self.attribute = attribute
+        self.parent = parent
+        self.children = []
+        # the columns that have no child yet
+        self.untried = untried
+        self.visits = 0
+        # sum of the rewards of the playouts through the node
+        self.reward = 0.0
+        # the AI reward when the result of the game is already decided in the node , None otherwise
+        self.result = result
+
+    # the child with the best upper confidence bound , the side that moves here picks its best child
+    def select_child(self):
+        log_visits = math.log(self.visits)
+        best_child = None
+        best_bound = -math.inf
+        for child in self.children:
+            bound = child.reward / child.visits + EXPLORATION * math.sqrt(log_visits / child.visits)
+            if bound > best_bound:
+                best_child = child
+                best_bound = bound
+        return best_child
+
+
+# Monte Carlo tree search with UCT : every playout walks down the tree choosing the children with the best upper
+# confidence bound , adds one node and plays random moves from it to the full board , the side with more
+# connections wins the playout like the real game
+# it can stop after any playout , the strength grows with the number of playouts instead of a depth
+# AI is the side to move in the root , like the depth-first search
+class MonteCarloSearch:
+    def __init__(self, state, seed=None, biased=False, stats=None):
+        self.state = state
+        self.rng = random.Random(seed)
+        # with biased rollouts a side completes a connection whenever it can , otherwise moves are uniform
+        self.biased = biased
+        # optional SearchStats , the nodes added per ply and the playouts are recorded in it
+        self.stats = stats
+        self.playouts = 0
+        self.root = self.new_node(NO_MOVE, PLAYER_VALUE, None, state)
+
+    # a node for the given state , a node below the root where the game is decided is scored without playouts ,
+    # the root is expanded even then so a move is always chosen , a symmetric root only tries one of every column
+    # and its mirror
+    def new_node(self, col, attribute, parent, state):
+        if parent is not None:
+            lead = state.decided_lead()
+            if lead is not None:
+                return MCTSNode(col, attribute, parent, [], lead_reward(lead))
+        if parent is None and state.is_symmetric():
+            untried = [col for col in state.config.mirror_half if state.can_play(col)]
+        else:
+            untried = state.valid_columns()
+        self.rng.shuffle(untried)
+        return MCTSNode(col, attribute, parent, untried, None)
+
+    # one playout : selection , expansion , rollout and backpropagation
+    def playout(self):
+        state = self.state.copy()
+        node = self.root
+        ply = 0
+        while not node.untried and node.children:
+            node = node.select_child()
+            state.make_move(node.col, node.attribute)
+            ply += 1
+        if node.untried:
+            col = node.untried.pop()
+            attribute = -node.attribute
+            state.make_move(col, attribute)
+            child = self.new_node(col, attribute, node, state)
+            node.children.append(child)
+            node = child
+            ply += 1
+            if self.stats is not None:
+                self.stats.count_node(ply)
+                if ply > self.stats.depth_reached:
+                    self.stats.depth_reached = ply
+        if node.result is not None:
+            reward = node.result
+        else:
+            reward = self.rollout(state, -node.attribute)
+        while node is not None:
+            node.visits += 1
+            node.reward += reward if node.attribute == AI_VALUE else 1.0 - reward
+            node = node.parent
+        self.playouts += 1
+
+    # plays the state to the full board starting with the given side and returns the AI reward
+    # works on the bitboards alone , the hashes and the evaluation are not needed to count the connections
+    def rollout(self, state, attribute):
+        config = state.config
+        column_height = config.column_height
+        rows = config.rows
+        random_value = self.rng.random
+        player_bits = state.player_bits
+        ai_bits = state.ai_bits
+        heights = state.heights[:]
+        open_columns = [col for col in range(config.columns) if heights[col] < rows]
+        while open_columns:
+            index = int(random_value() * len(open_columns))
+            if self.biased:
+                mask = player_bits | ai_bits
+                own_bits = ai_bits if attribute == AI_VALUE else player_bits
+                cells = config.completing_cells(own_bits, mask) & (mask + config.bottom_mask)
+                if cells:
+                    # the lowest completing cell , its column is still open since the cell is playable
+                    index = open_columns.index(((cells & -cells).bit_length() - 1) // column_height)
+            col = open_columns[index]
+            bit = 1 << (col * column_height + heights[col])
+            if attribute == AI_VALUE:
+                ai_bits |= bit
+            else:
+                player_bits |= bit
+            heights[col] += 1
+            if heights[col] == rows:
+                open_columns[index] = open_columns[-1]
+                open_columns.pop()
+            attribute = -attribute
+        return lead_reward(config.count_connections(ai_bits) - config.count_connections(player_bits))
+
+    # runs up to playouts playouts , or until budget_ms milliseconds have passed when it is given
+    def run(self, playouts, budget_ms=None):
+        deadline = None if budget_ms is None else time.perf_counter() + budget_ms / 1000
+        start_playouts = self.playouts
+        for count in range(playouts):
+            if not self.root.untried and not self.root.children:
+                break
+            self.playout()
+            if deadline is not None and not count & (TIME_CHECK_PLAYOUTS - 1) and time.perf_counter() >= deadline:
+                break
+        if self.stats is not None:
+            self.stats.leaves += self.playouts - start_playouts
+
+    # the visits and the reward of every root move , what the workers of a parallel search send back
+    def root_statistics(self):
+        return [(child.col, child.visits, child.reward) for child in self.root.children]
+
+    # returns the AI reward expected after the best move and the move , the best move is the most visited one
+    def search(self, playouts, budget_ms=None):
+        self.run(playouts, budget_ms)
+        return best_root_move(self.root_statistics())
+
+
+# the most visited move and its mean reward , ties go to the higher mean reward
+def best_root_move(statistics):
+    best_col = NO_MOVE
+    best_key = None
+    for col, visits, reward in statistics:
+        key = (visits, reward / visits if visits else 0.0)
+        if best_key is None or key > best_key:
+            best_col = col
+            best_key = key
+    if best_key is None:
+        return 0.0, NO_MOVE
+    return best_key[1], best_col
+
+
+# sums the root statistics of several searches of the same position , the move visits of every tree add up
+def merge_root_statistics(results):
+    merged = {}
+    for statistics in results:
+        for col, visits, reward in statistics:
+            total_visits, total_reward = merged.get(col, (0, 0.0))
+            merged[col] = (total_visits + visits, total_reward + reward)
+    return [(col, visits, reward) for col, (visits, reward) in merged.items()]
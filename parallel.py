@@ -0,0 +1,117 @@
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from bitboard import BitBoard, AI_VALUE
+from evaluation import IncrementalEvaluator, position_score
+from mcts import MonteCarloSearch, best_root_move, merge_root_statistics
+from search import Search
+from transposition import TranspositionTable, NO_MOVE
+
+# value of the shared alpha bound before any root move is finished
+NO_BOUND = -2 ** 62
+
+# the alpha bound shared by all the workers of the pool , set by init_worker in every worker process
+shared_alpha = None
+
+
+def init_worker(alpha_value):
+    global shared_alpha
+    shared_alpha = alpha_value
+
+
+# searches the position after the AI drops a coin in col , runs inside a worker process
+# the best score finished so far is read from the shared bound and used as alpha , minus one so a move
+# as good as the best one still gets its exact score and ties are broken in root order like the serial search
+def search_root_move(player_bits, ai_bits, config, col, depth, table_size_mb):
+    state = BitBoard.from_bits(player_bits, ai_bits, config)
+    table = TranspositionTable(table_size_mb) if table_size_mb else None
+    search = Search(state, IncrementalEvaluator.from_state(state), table)
+    search.play(col, AI_VALUE)
+    alpha = shared_alpha.value if shared_alpha is not None else NO_BOUND
+    alpha = -math.inf if alpha == NO_BOUND else alpha - 1
+    utility, _ = search.alpha_beta_minimize(depth - 1, alpha, math.inf)
+    # a finished move can only raise the bound with an exact score , bounds are always below it
+    if shared_alpha is not None:
+        with shared_alpha.get_lock():
+            if utility > shared_alpha.value:
+                shared_alpha.value = utility
+    return col, utility, search.nodes
+
+
+# grows a Monte Carlo tree of the position with its own seed , runs inside a worker process
+# only the statistics of the root moves are sent back , the rest of the tree stays in the worker
+def run_playouts(player_bits, ai_bits, config, playouts, budget_ms, seed, biased):
+    search = MonteCarloSearch(BitBoard.from_bits(player_bits, ai_bits, config), seed, biased)
+    search.run(playouts, budget_ms)
+    return search.root_statistics(), search.playouts
+
+
+# alpha-beta with the root moves split across worker processes
+# the first root move is searched alone (young brothers wait) so the other moves start with its score as alpha ,
+# then the remaining moves run in parallel and share the best score found through shared memory
+# gives the same score and column as Search.alpha_beta without a table
+# the same workers also run Monte Carlo searches , every worker grows its own tree and the root moves are merged
+class ParallelSearch:
+    def __init__(self, workers=None, table_size_mb=4):
+        self.workers = workers or os.cpu_count()
+        self.shared_alpha = multiprocessing.Value('q', NO_BOUND)
+        self.executor = ProcessPoolExecutor(self.workers, initializer=init_worker, initargs=(self.shared_alpha,))
+        self.table_size_mb = table_size_mb
+        # number of positions visited by the workers in the last search
+        self.nodes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown()
+
+    # returns the best score and column for the AI in the given state
+    def alpha_beta(self, state, depth):
+        # the root moves in the order the serial root tries them , so ties go to the same column
+        root = Search(state.copy(), IncrementalEvaluator.from_state(state))
+        root.visit()
+        moves = root.ordered_moves(NO_MOVE, AI_VALUE)
+        if depth == 0 or not moves:
+            return position_score(state, root.evaluator), NO_MOVE
+
+        self.shared_alpha.value = NO_BOUND
+        self.nodes = 1
+        scores = {}
+        first = self.executor.submit(search_root_move, state.player_bits, state.ai_bits, state.config, moves[0],
+                                     depth, self.table_size_mb)
+        pending = {first}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                col, utility, nodes = future.result()
+                scores[col] = utility
+                self.nodes += nodes
+            # the eldest brother is finished , the rest of the root moves can start
+            if len(scores) == 1 and not pending:
+                pending = {self.executor.submit(search_root_move, state.player_bits, state.ai_bits, state.config,
+                                                col, depth, self.table_size_mb) for col in moves[1:]}
+
+        max_col = NO_MOVE
+        max_utility = -math.inf
+        for col in moves:
+            if scores[col] > max_utility:
+                max_col = col
+                max_utility = scores[col]
+        return max_utility, max_col
+
+    # Monte Carlo search with one tree per worker (root parallelization) , the playouts are split between the
+    # workers and the visits and rewards of every root move are summed , returns the AI reward expected after the
+    # most visited move and the move
+    # with budget_ms every worker plays until the time runs out instead , the merged tree grows with the workers
+    def mcts(self, state, playouts, budget_ms=None, biased=False):
+        share = -(-playouts // self.workers)
+        futures = [self.executor.submit(run_playouts, state.player_bits, state.ai_bits, state.config, share,
+                                        budget_ms, seed, biased) for seed in range(self.workers)]
+        results = [future.result() for future in futures]
+        self.nodes = sum(playouts for _, playouts in results)
+        return best_root_move(merge_root_statistics(statistics for statistics, _ in results))
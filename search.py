@@ -0,0 +1,340 @@
+import math
+import time
+from bitboard import PLAYER_VALUE, AI_VALUE
+from evaluation import terminal_score, position_score
+from transposition import NO_MOVE, EXACT, bound_type, table_key, table_move
+
+# the clock is only read every TIME_CHECK_NODES nodes , must be a power of 2
+TIME_CHECK_NODES = 1024
+
+
+# raised inside the recursion when the time budget of an iterative deepening search runs out
+class SearchTimeout(Exception):
+    pass
+
+
+# depth-first minimax and alpha-beta that generate the moves during the recursion instead of building the tree ,
+# only one state is kept , every move is made before searching it and unmade after
+# AI is the maximizing side and scores are evaluated from its perspective like the tree search
+class Search:
+    def __init__(self, state, evaluator, table=None, stats=None):
+        self.state = state
+        self.evaluator = evaluator
+        self.table = table
+        # optional SearchStats , every recording is skipped when it is None
+        self.stats = stats
+        # number of positions visited since the search was created
+        self.nodes = 0
+        # the columns played from the root to the current node
+        self.path = []
+        # the best line found by the last finished iteration , and how much of it the current path follows
+        self.previous_pv = []
+        self.pv_matched = 0
+        # pv_lines[ply] is the best line found from the node at that ply
+        self.pv_lines = []
+        # two killer moves per ply : moves that caused a cutoff in a sibling node
+        self.killers = []
+        # history[side][col] grows every time the column causes a cutoff for that side
+        self.history = {PLAYER_VALUE: [0] * state.config.columns, AI_VALUE: [0] * state.config.columns}
+        # the search raises SearchTimeout after this perf_counter value , None means no limit
+        self.deadline = None
+
+    def play(self, col, attribute):
+        self.evaluator.add(self.state.make_move(col, attribute), col, attribute)
+        if self.pv_matched == len(self.path) < len(self.previous_pv) and self.previous_pv[self.pv_matched] == col:
+            self.pv_matched += 1
+        self.path.append(col)
+
+    def undo(self, col):
+        row, attribute = self.state.unmake_move(col)
+        self.evaluator.remove(row, col, attribute)
+        self.path.pop()
+        if self.pv_matched > len(self.path):
+            self.pv_matched = len(self.path)
+
+    # counts the node , clears its best line and checks the time budget every TIME_CHECK_NODES nodes
+    def visit(self):
+        self.nodes += 1
+        ply = len(self.path)
+        while len(self.pv_lines) <= ply + 1:
+            self.pv_lines.append([])
+            self.killers.append([NO_MOVE, NO_MOVE])
+        self.pv_lines[ply] = []
+        if self.stats is not None:
+            self.stats.count_node(ply)
+        if self.deadline is not None and not self.nodes & (TIME_CHECK_NODES - 1) \
+                and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+    # the columns to try in a node : the move of the previous principal variation , the stored best move ,
+    # the moves completing a connection , the moves taking a cell that completes a connection of the other side ,
+    # the killer moves of the ply , then the rest by history score and from the center outwards
+    # in a symmetric position the columns right of the center are left out , their mirrors score the same
+    def ordered_moves(self, best_col, attribute):
+        ply = len(self.path)
+        first = []
+        if self.pv_matched == ply < len(self.previous_pv):
+            first.append(self.previous_pv[ply])
+        first.append(best_col)
+        first.extend(self.state.connection_columns(attribute))
+        first.extend(self.state.connection_columns(-attribute))
+        first.extend(self.killers[ply])
+        history = self.history[attribute]
+        config = self.state.config
+        columns = config.mirror_half if self.state.is_symmetric() else config.center_order
+        moves = []
+        for col in first:
+            if col in columns and col not in moves and self.state.can_play(col):
+                moves.append(col)
+        rest = [col for col in columns if col not in moves and self.state.can_play(col)]
+        rest.sort(key=lambda col: -history[col])
+        return moves + rest
+
+    # the score of the current node when it is a leaf : when the game is decided or at depth 0 ,
+    # None when the node has to be searched
+    def leaf_score(self, depth):
+        if self.stats is None:
+            utility = terminal_score(self.state)
+            if utility is None and depth <= 0:
+                return self.evaluator.score(AI_VALUE) - self.evaluator.score(PLAYER_VALUE)
+            return utility
+        start = time.perf_counter()
+        utility = terminal_score(self.state)
+        if utility is None and depth <= 0:
+            utility = self.evaluator.score(AI_VALUE) - self.evaluator.score(PLAYER_VALUE)
+        self.stats.add_time("evaluate", time.perf_counter() - start)
+        if utility is not None:
+            self.stats.leaves += 1
+        return utility
+
+    # the moves of the current node , timed as child generation when stats are recorded
+    def generate_moves(self, moves_func, *args):
+        if self.stats is None:
+            return moves_func(*args)
+        start = time.perf_counter()
+        moves = moves_func(*args)
+        self.stats.add_time("generate_children", time.perf_counter() - start)
+        return moves
+
+    # a move caused a cutoff at the current ply , remember it for the sibling nodes
+    def record_cutoff(self, col, attribute, depth):
+        killers = self.killers[len(self.path)]
+        if killers[0] != col:
+            killers[1] = killers[0]
+            killers[0] = col
+        self.history[attribute][col] += depth * depth
+        if self.stats is not None:
+            if attribute == AI_VALUE:
+                self.stats.beta_cutoffs += 1
+            else:
+                self.stats.alpha_cutoffs += 1
+
+    # a move improved the score of the node , its line becomes the best line of the current ply
+    def update_pv(self, col):
+        ply = len(self.path)
+        self.pv_lines[ply] = [col] + self.pv_lines[ply + 1]
+
+    # used by minimax algorithm , returns the maximum score and the column that gives it
+    def minimax_maximize(self, depth):
+        self.visit()
+        # if a leaf node , calculate the score and return it
+        utility = self.leaf_score(depth)
+        if utility is not None:
+            return utility, NO_MOVE
+        moves = self.generate_moves(self.state.valid_columns)
+
+        max_col = NO_MOVE
+        max_utility = -math.inf
+        for col in moves:
+            self.play(col, AI_VALUE)
+            utility, _ = self.minimax_minimize(depth - 1)
+            self.undo(col)
+            if utility > max_utility:
+                max_col = col
+                max_utility = utility
+        return max_utility, max_col
+
+    # used by minimax algorithm , returns the minimum score and the column that gives it
+    def minimax_minimize(self, depth):
+        self.visit()
+        # if a leaf node , calculate the score and return it
+        utility = self.leaf_score(depth)
+        if utility is not None:
+            return utility, NO_MOVE
+        moves = self.generate_moves(self.state.valid_columns)
+
+        min_col = NO_MOVE
+        min_utility = math.inf
+        for col in moves:
+            self.play(col, PLAYER_VALUE)
+            utility, _ = self.minimax_maximize(depth - 1)
+            self.undo(col)
+            if utility < min_utility:
+                min_col = col
+                min_utility = utility
+        return min_utility, min_col
+
+    # used by alpha-beta pruning algorithm , returns the maximum score and the column that gives it
+    def alpha_beta_maximize(self, depth, alpha, beta):
+        self.visit()
+        # if a leaf node , calculate the score and return it
+        utility = self.leaf_score(depth)
+        if utility is not None:
+            return utility, NO_MOVE
+
+        best_col = NO_MOVE
+        if self.table is not None:
+            key, mirrored = table_key(self.state, True)
+            alpha_before, beta_before = alpha, beta
+            utility, alpha, beta, best_col = self.table.probe_window(key, depth, alpha, beta)
+            best_col = table_move(best_col, mirrored, self.state.config)
+            if utility is not None:
+                if self.stats is not None:
+                    self.stats.table_cutoffs += 1
+                return utility, best_col
+
+        max_col = NO_MOVE
+        max_utility = -math.inf
+        for col in self.generate_moves(self.ordered_moves, best_col, AI_VALUE):
+            self.play(col, AI_VALUE)
+            utility, _ = self.alpha_beta_minimize(depth - 1, alpha, beta)
+            self.undo(col)
+            # if a higher score is found among children , set it as the best child
+            if utility > max_utility:
+                max_col = col
+                max_utility = utility
+                self.update_pv(col)
+
+            # prune the whole branch
+            if max_utility >= beta:
+                self.record_cutoff(col, AI_VALUE, depth)
+                break
+
+            if max_utility > alpha:
+                alpha = max_utility
+
+        if self.table is not None:
+            self.table.store(key, depth, max_utility, bound_type(max_utility, alpha_before, beta_before),
+                             table_move(max_col, mirrored, self.state.config))
+        return max_utility, max_col
+
+    # used by alpha-beta pruning algorithm , returns the minimum score and the column that gives it
+    def alpha_beta_minimize(self, depth, alpha, beta):
+        self.visit()
+        # if a leaf node , calculate the score and return it
+        utility = self.leaf_score(depth)
+        if utility is not None:
+            return utility, NO_MOVE
+
+        best_col = NO_MOVE
+        if self.table is not None:
+            key, mirrored = table_key(self.state, False)
+            alpha_before, beta_before = alpha, beta
+            utility, alpha, beta, best_col = self.table.probe_window(key, depth, alpha, beta)
+            best_col = table_move(best_col, mirrored, self.state.config)
+            if utility is not None:
+                if self.stats is not None:
+                    self.stats.table_cutoffs += 1
+                return utility, best_col
+
+        min_col = NO_MOVE
+        min_utility = math.inf
+        for col in self.generate_moves(self.ordered_moves, best_col, PLAYER_VALUE):
+            self.play(col, PLAYER_VALUE)
+            utility, _ = self.alpha_beta_maximize(depth - 1, alpha, beta)
+            self.undo(col)
+            # if a lower score is found among children , set it as the best child
+            if utility < min_utility:
+                min_col = col
+                min_utility = utility
+                self.update_pv(col)
+
+            # prune the whole branch
+            if min_utility <= alpha:
+                self.record_cutoff(col, PLAYER_VALUE, depth)
+                break
+
+            if min_utility < beta:
+                beta = min_utility
+
+        if self.table is not None:
+            self.table.store(key, depth, min_utility, bound_type(min_utility, alpha_before, beta_before),
+                             table_move(min_col, mirrored, self.state.config))
+        return min_utility, min_col
+
+    # alpha-beta at the root , every root move is searched so a valid column is always returned
+    # even when the table holds an entry for the root position
+    def alpha_beta(self, depth):
+        self.visit()
+        alpha = -math.inf
+        max_col = NO_MOVE
+        max_utility = -math.inf
+        for col in self.generate_moves(self.ordered_moves, self.root_best_move(), AI_VALUE):
+            self.play(col, AI_VALUE)
+            utility, _ = self.alpha_beta_minimize(depth - 1, alpha, math.inf)
+            self.undo(col)
+            if utility > max_utility:
+                max_col = col
+                max_utility = utility
+                alpha = utility
+                self.update_pv(col)
+
+        if self.stats is not None:
+            self.stats.depth_reached = depth
+        # the root is searched with the full window so its score is exact
+        if self.table is not None and max_col != NO_MOVE:
+            key, mirrored = table_key(self.state, True)
+            self.table.store(key, depth, max_utility, EXACT,
+                             table_move(max_col, mirrored, self.state.config))
+        return max_utility, max_col
+
+    # minimax at the root , the root moves are searched even when the game is decided so a column is returned
+    def minimax(self, depth):
+        self.visit()
+        max_col = NO_MOVE
+        max_utility = -math.inf
+        for col in self.generate_moves(self.state.valid_columns):
+            self.play(col, AI_VALUE)
+            utility, _ = self.minimax_minimize(depth - 1)
+            self.undo(col)
+            if utility > max_utility:
+                max_col = col
+                max_utility = utility
+
+        if self.stats is not None:
+            self.stats.depth_reached = depth
+        return max_utility, max_col
+
+    # the stored best move of the root position , the root is always a maximizing node
+    def root_best_move(self):
+        if self.table is None:
+            return NO_MOVE
+        key, mirrored = table_key(self.state, True)
+        return table_move(self.table.best_move(key), mirrored, self.state.config)
+
+    # runs alpha-beta to depth 1 , 2 , 3 ... until max_depth or until budget_ms milliseconds have passed ,
+    # every iteration tries the principal variation of the previous one first
+    # returns the score and column of the deepest finished iteration and that depth ,
+    # the first iteration is never interrupted so a column is always returned
+    def iterative_deepening(self, budget_ms, max_depth):
+        start = time.perf_counter()
+        empty_cells = self.state.config.cells - self.state.moves_played
+        result = (position_score(self.state, self.evaluator), NO_MOVE, 0)
+        for depth in range(1, max_depth + 1):
+            self.deadline = None if depth == 1 else start + budget_ms / 1000
+            try:
+                utility, col = self.alpha_beta(depth)
+            except SearchTimeout:
+                # take back the moves of the interrupted iteration
+                while self.path:
+                    self.undo(self.path[-1])
+                break
+            finally:
+                self.deadline = None
+            result = (utility, col, depth)
+            self.previous_pv = self.pv_lines[0]
+            self.pv_matched = 0
+            # the whole rest of the game was searched
+            if depth >= empty_cells:
+                break
+        return result
@@ -0,0 +1,175 @@
+# plays engine-vs-engine games without the GUI , in parallel across processes , to compare
+# algorithms , depths and evaluation weights
+#
+#   python selfplay.py --games 200 --a alpha_beta,depth=5 --b minimax,depth=3 --workers 8 --output games.jsonl
+#   python selfplay.py --a alpha_beta,depth=4,weights=10000/900/40/2 --b alpha_beta,depth=4,weights=10000/700/60/3
+#   python selfplay.py --rows 7 --columns 8 --connect 5 --a alpha_beta,depth=4 --b minimax,depth=3
+#   python selfplay.py --a mcts,playouts=20000,time_ms=500 --b alpha_beta,time_ms=500
+#
+# an engine is written as algorithm[,key=value ...] where the algorithm is minimax , alpha_beta or mcts and the
+# keys are
+#   depth     fixed search depth , or the deepest iteration when time_ms is given , MAX_SEARCH_DEPTH by default then
+#   time_ms   time budget of every move , alpha-beta deepens iteratively and mcts plays out games until it runs out
+#   weights   four/three/two/center evaluation weights
+#   playouts  most playouts of every mcts move
+#   biased    1 for mcts rollouts that complete a connection whenever they can
+# the engines swap sides every game , the first mover plays the AI coins like in the GUI ,
+# a game ends when the board is full and is won by the side with more connections
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from bitboard import BitBoard, PLAYER_VALUE, AI_VALUE, ROWS_COUNT, COLUMNS_COUNT, CONNECT_COUNT, board_config
+from engine import DEPTH_CUTOFF, MAX_SEARCH_DEPTH, TABLE_SIZE_MB, MCTS_PLAYOUTS, MINIMAX, ALPHA_BETA, MCTS
+from evaluation import IncrementalEvaluator, DEFAULT_WEIGHTS, Weights
+from mcts import MonteCarloSearch
+from search import Search
+from transposition import TranspositionTable
+
+ALGORITHMS = {"minimax": MINIMAX, "alpha_beta": ALPHA_BETA, "mcts": MCTS}
+
+WIN = "win"
+DRAW = "draw"
+LOSS = "loss"
+
+
+def parse_engine(spec):
+    name, *options = spec.split(",")
+    if name not in ALGORITHMS:
+        raise argparse.ArgumentTypeError("unknown algorithm %r , use one of %s" % (name, ", ".join(ALGORITHMS)))
+    engine = {"spec": spec, "algorithm": ALGORITHMS[name], "depth": None, "time_ms": None,
+              "weights": DEFAULT_WEIGHTS, "playouts": MCTS_PLAYOUTS, "biased": False}
+    for option in options:
+        key, _, value = option.partition("=")
+        if key == "depth":
+            engine["depth"] = int(value)
+        elif key == "time_ms":
+            engine["time_ms"] = float(value)
+        elif key == "weights":
+            engine["weights"] = Weights(*(int(weight) for weight in value.split("/")))
+        elif key == "playouts":
+            engine["playouts"] = int(value)
+        elif key == "biased":
+            engine["biased"] = value == "1"
+        else:
+            raise argparse.ArgumentTypeError("unknown engine option %r" % key)
+    # a time budget deepens as far as it allows unless a depth caps it
+    if engine["depth"] is None:
+        engine["depth"] = MAX_SEARCH_DEPTH if engine["time_ms"] is not None else DEPTH_CUTOFF
+    return engine
+
+
+# the column an engine plays for the side with the given coin value
+# the search always maximizes for the AI , so for the player it searches the position with the sides exchanged
+# seed makes the playouts of mcts repeatable
+def choose_column(engine, state, attribute, table, seed):
+    if attribute == PLAYER_VALUE:
+        state = state.swapped()
+    else:
+        state = state.copy()
+    if engine["algorithm"] == MCTS:
+        search = MonteCarloSearch(state, seed, engine["biased"])
+        utility, col = search.search(engine["playouts"], engine["time_ms"])
+        return col, search.playouts
+    search = Search(state, IncrementalEvaluator.from_state(state, engine["weights"]), table)
+    if engine["algorithm"] == MINIMAX:
+        utility, col = search.minimax(engine["depth"])
+    elif engine["time_ms"] is not None:
+        utility, col, depth = search.iterative_deepening(engine["time_ms"], engine["depth"])
+    else:
+        utility, col = search.alpha_beta(engine["depth"])
+    return col, search.nodes
+
+
+# plays one game on the board of config and returns its record , engine a moves first in even games
+def play_game(game, engine_a, engine_b, opening_plies, seed, config):
+    rng = random.Random(seed)
+    a_first = game % 2 == 0
+    # the first mover drops AI coins
+    a_value = AI_VALUE if a_first else PLAYER_VALUE
+    engines = {a_value: engine_a, -a_value: engine_b}
+    tables = {a_value: TranspositionTable(TABLE_SIZE_MB), -a_value: TranspositionTable(TABLE_SIZE_MB)}
+    state = BitBoard(config)
+    attribute = AI_VALUE
+    moves = []
+    start = time.perf_counter()
+
+    while not state.is_full():
+        move_start = time.perf_counter()
+        if len(moves) < opening_plies:
+            col, nodes = rng.choice(state.valid_columns()), 0
+            engine_name = "opening"
+        else:
+            col, nodes = choose_column(engines[attribute], state, attribute, tables[attribute], rng.getrandbits(32))
+            engine_name = "a" if attribute == a_value else "b"
+        state.make_move(col, attribute)
+        moves.append({"col": col, "by": engine_name, "nodes": nodes,
+                      "ms": round((time.perf_counter() - move_start) * 1000, 3)})
+        attribute = -attribute
+
+    # the same full-board scoring as the GUI
+    a_count = state.connections_count(a_value)
+    b_count = state.connections_count(-a_value)
+    if a_count > b_count:
+        result = WIN
+    elif a_count < b_count:
+        result = LOSS
+    else:
+        result = DRAW
+    return {"game": game, "seed": seed, "a_first": a_first, "result": result, "a_connections": a_count,
+            "b_connections": b_count, "seconds": round(time.perf_counter() - start, 4), "moves": moves}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless engine-vs-engine matches.")
+    parser.add_argument("--a", type=parse_engine, default=parse_engine("alpha_beta"), help="first engine")
+    parser.add_argument("--b", type=parse_engine, default=parse_engine("minimax"), help="second engine")
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--opening-plies", type=int, default=4, help="random moves played before the engines")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rows", type=int, default=ROWS_COUNT)
+    parser.add_argument("--columns", type=int, default=COLUMNS_COUNT)
+    parser.add_argument("--connect", type=int, default=CONNECT_COUNT, help="coins in a row that make a connection")
+    parser.add_argument("--output", help="JSONL file for the game records , - for stdout")
+    args = parser.parse_args()
+    try:
+        config = board_config(args.rows, args.columns, args.connect)
+    except ValueError as error:
+        parser.error(str(error))
+
+    output = None
+    if args.output == "-":
+        output = sys.stdout
+    elif args.output:
+        output = open(args.output, "w")
+
+    counts = {WIN: 0, DRAW: 0, LOSS: 0}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.workers) as executor:
+        futures = [executor.submit(play_game, game, args.a, args.b, args.opening_plies, args.seed * 1000003 + game,
+                                   config) for game in range(args.games)]
+        # the records are written as soon as each game finishes
+        for future in as_completed(futures):
+            record = future.result()
+            counts[record["result"]] += 1
+            if output is not None:
+                record["a"] = args.a["spec"]
+                record["b"] = args.b["spec"]
+                output.write(json.dumps(record) + "\n")
+                output.flush()
+    elapsed = time.perf_counter() - start
+
+    if output is not None and output is not sys.stdout:
+        output.close()
+    print("%s vs %s : %d wins , %d draws , %d losses for %s"
+          % (args.a["spec"], args.b["spec"], counts[WIN], counts[DRAW], counts[LOSS], args.a["spec"]),
+          file=sys.stderr)
+    print("%d games in %.2f s , %.2f games/sec" % (args.games, elapsed, args.games / elapsed), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
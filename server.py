@@ -0,0 +1,344 @@
+# serves many human-vs-AI games from one asyncio process over a small JSON HTTP API
+#
+#   python server.py --port 8404 --workers 4
+#
+#   POST   /games              {"algorithm": "alpha_beta" , "minimax" or "mcts" , "ai_first": true}  starts a game ,
+#                              "rows" , "columns" and "connect" play another board than the 6 x 7 connect 4
+#   GET    /games/<id>         the state of a game
+#   POST   /games/<id>/moves   {"col": 3}  drops the player coin , the AI answers in the same response
+#   DELETE /games/<id>         ends a game
+#   GET    /stats              the counters of the server , with --cache also the hit rate and latency of the
+#                              position caches of the workers , see cache.py
+#
+# every game is a session holding its own C4Puzzle , the searches run in a bounded process pool so the event loop
+# only parses requests and moves coins , a move is answered with 503 when the pool already has --max-pending
+# searches and with 504 when the AI did not answer before --deadline-ms , the player coin is then taken back
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from bitboard import BitBoard, ROWS_COUNT, COLUMNS_COUNT, CONNECT_COUNT, PLAYER_VALUE, AI_VALUE, board_config
+from engine import C4Puzzle, DEPTH_CUTOFF, MAX_SEARCH_DEPTH, TABLE_SIZE_MB, MINIMAX, ALPHA_BETA, winner
+from engine import MCTS, MCTS_PLAYOUTS
+from cache import merge_stats
+from transposition import TranspositionTable
+
+ALGORITHMS = {"minimax": MINIMAX, "alpha_beta": ALPHA_BETA, "mcts": MCTS}
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 409: "Conflict",
+           503: "Service Unavailable", 504: "Gateway Timeout"}
+
+# largest request body read , the requests are a few bytes of JSON
+MAX_BODY_BYTES = 4096
+
+# most rows and columns of a board , every size played keeps its tables in every process
+MAX_BOARD_SIDE = 12
+
+# the transposition table , opening book and position cache of a worker process , set by init_worker
+worker_table = None
+worker_book = None
+worker_cache = None
+
+
+def init_worker(table_size_mb, book_file, cache_file):
+    global worker_table, worker_book, worker_cache
+    worker_table = TranspositionTable(table_size_mb)
+    if book_file is not None:
+        from book import OpeningBook
+        worker_book = OpeningBook(book_file)
+    if cache_file is not None:
+        from cache import PositionCache
+        from multiprocessing.util import Finalize
+        worker_cache = PositionCache(cache_file)
+        # the entries not flushed yet are written when the worker exits
+        Finalize(worker_cache, worker_cache.close, exitpriority=10)
+
+
+# searches the AI move of a position , runs inside a worker process
+# the table and cache of the worker are shared by all the games it searches , a position means the same in
+# every game , returns the column , its score and the worker pid and cache stats when it has a cache
+def search_move(player_bits, ai_bits, config, algorithm, budget_ms):
+    node = C4Puzzle(BitBoard.from_bits(player_bits, ai_bits, config))
+    if algorithm == MINIMAX:
+        col, utility = node.search(DEPTH_CUTOFF, algorithm)
+    elif algorithm == MCTS:
+        col, utility = node.search(MCTS_PLAYOUTS, algorithm, budget_ms=budget_ms)
+    else:
+        col, utility = node.search(MAX_SEARCH_DEPTH, algorithm, worker_table, budget_ms, book=worker_book,
+                                   cache=worker_cache)
+    cache_stats = (os.getpid(), worker_cache.stats()) if worker_cache is not None else None
+    return col, utility, cache_stats
+
+
+# true for a JSON integer , true and false are ints in Python but not numbers of the API
+def is_number(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+# raised by the request handlers , turned into a JSON error response
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# one game : the current node and a lock so two requests never move in the same game at once
+class GameSession:
+    def __init__(self, game_id, algorithm, config):
+        self.game_id = game_id
+        self.algorithm = algorithm
+        self.node = C4Puzzle(config=config)
+        self.lock = asyncio.Lock()
+        self.last_active = time.monotonic()
+
+    def is_over(self):
+        return self.node.is_full()
+
+    def to_dict(self):
+        state = self.node.state
+        config = state.config
+        record = {
+            "id": self.game_id,
+            "algorithm": self.algorithm,
+            "rows": config.rows,
+            "columns": config.columns,
+            "connect": config.connect,
+            # row 0 is the bottom row like the GUI board
+            "board": [[state.cell(row, col) for col in range(config.columns)] for row in range(config.rows)],
+            "valid_columns": state.valid_columns(),
+            "game_over": self.is_over(),
+        }
+        if self.is_over():
+            record["winner"] = {PLAYER_VALUE: "player", AI_VALUE: "ai"}.get(winner(self.node), "draw")
+        return record
+
+
+class GameServer:
+    def __init__(self, workers=None, move_time_ms=200, deadline_ms=2000, max_pending=None, max_sessions=10000,
+                 session_ttl_s=1800, book_file=None, cache_file=None):
+        workers = workers or os.cpu_count()
+        # spawned and not forked , a forked worker would inherit the sockets of the connections open at that time
+        # and keep them open after the server closes them
+        self.executor = ProcessPoolExecutor(workers, multiprocessing.get_context("spawn"), init_worker,
+                                            (TABLE_SIZE_MB, book_file, cache_file))
+        self.move_time_ms = move_time_ms
+        self.deadline_ms = deadline_ms
+        # searches waiting or running in the pool before new moves are turned away
+        self.max_pending = max_pending or 2 * workers
+        self.pending = 0
+        self.max_sessions = max_sessions
+        self.session_ttl_s = session_ttl_s
+        self.sessions = {}
+        self.ids = itertools.count(1)
+        self.served = 0
+        self.rejected = 0
+        self.timed_out = 0
+        # the latest position cache stats of every worker by its pid
+        self.cache_stats = {}
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # runs on a thread of the pool when a search finishes or is cancelled , pending is only changed on the event loop
+    def search_finished(self, loop):
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(self.release_slot)
+
+    def release_slot(self):
+        self.pending -= 1
+
+    # the AI move of a session , raises HTTPError when the pool is saturated or the deadline passes
+    async def ai_move(self, session):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPError(503, "all search workers are busy")
+        state = session.node.state
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        future = self.executor.submit(search_move, state.player_bits, state.ai_bits, state.config,
+                                      ALGORITHMS[session.algorithm], self.move_time_ms)
+        # the slot is only given back when the worker is done , a search that passed its deadline keeps its worker
+        # busy until it finishes , only a search still queued is cancelled
+        future.add_done_callback(lambda _: self.search_finished(loop))
+        try:
+            col, utility, cache_stats = await asyncio.wait_for(asyncio.wrap_future(future), self.deadline_ms / 1000)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise HTTPError(504, "the AI did not move before the deadline")
+        if cache_stats is not None:
+            pid, self.cache_stats[pid] = cache_stats
+        session.node = session.node.play(col, AI_VALUE)
+        return col, utility
+
+    # drops the sessions nobody moved in for session_ttl_s seconds
+    def expire_sessions(self):
+        now = time.monotonic()
+        for game_id in [game_id for game_id, session in self.sessions.items()
+                        if now - session.last_active > self.session_ttl_s]:
+            del self.sessions[game_id]
+
+    def session(self, game_id):
+        session = self.sessions.get(game_id)
+        if session is None:
+            raise HTTPError(404, "no game %s" % game_id)
+        session.last_active = time.monotonic()
+        return session
+
+    async def new_game(self, body):
+        algorithm = body.get("algorithm", "alpha_beta")
+        if algorithm not in ALGORITHMS:
+            raise HTTPError(400, "unknown algorithm %r , use one of %s" % (algorithm, ", ".join(ALGORITHMS)))
+        config = self.board(body)
+        self.expire_sessions()
+        if len(self.sessions) >= self.max_sessions:
+            self.rejected += 1
+            raise HTTPError(503, "too many games")
+        session = GameSession(str(next(self.ids)), algorithm, config)
+        record = {}
+        # the AI moves first like in the GUI unless asked otherwise
+        if body.get("ai_first", True):
+            record["ai_col"], record["score"] = await self.ai_move(session)
+        self.sessions[session.game_id] = session
+        record.update(session.to_dict())
+        return 201, record
+
+    # the board config asked for by a new game , the default board when the body names none
+    def board(self, body):
+        sizes = [body.get(name, default) for name, default in
+                 (("rows", ROWS_COUNT), ("columns", COLUMNS_COUNT), ("connect", CONNECT_COUNT))]
+        if not all(is_number(size) and 0 < size <= MAX_BOARD_SIDE for size in sizes):
+            raise HTTPError(400, "rows , columns and connect must be numbers from 1 to %d" % MAX_BOARD_SIDE)
+        try:
+            return board_config(*sizes)
+        except ValueError as error:
+            raise HTTPError(400, str(error))
+
+    async def play(self, game_id, body):
+        session = self.session(game_id)
+        col = body.get("col")
+        if not is_number(col):
+            raise HTTPError(400, "col must be a column number")
+        if session.lock.locked():
+            raise HTTPError(409, "a move is already being played in this game")
+        async with session.lock:
+            if session.is_over():
+                raise HTTPError(409, "the game is over")
+            if not session.node.state.can_play(col):
+                raise HTTPError(400, "column %d is full or outside the board" % col)
+            previous = session.node
+            session.node = previous.play(col, PLAYER_VALUE)
+            record = {"player_col": col}
+            if not session.is_over():
+                try:
+                    record["ai_col"], record["score"] = await self.ai_move(session)
+                except HTTPError:
+                    # the move is only played when the AI answers it
+                    session.node = previous
+                    raise
+            record.update(session.to_dict())
+            return 200, record
+
+    async def route(self, method, path, body):
+        parts = [part for part in path.split("/") if part]
+        if parts == ["games"] and method == "POST":
+            return await self.new_game(body)
+        if len(parts) == 2 and parts[0] == "games":
+            if method == "GET":
+                return 200, self.session(parts[1]).to_dict()
+            if method == "DELETE":
+                self.session(parts[1])
+                del self.sessions[parts[1]]
+                return 200, {"id": parts[1], "deleted": True}
+        if len(parts) == 3 and parts[0] == "games" and parts[2] == "moves" and method == "POST":
+            return await self.play(parts[1], body)
+        if parts == ["stats"] and method == "GET":
+            record = {"sessions": len(self.sessions), "pending": self.pending, "served": self.served,
+                      "rejected": self.rejected, "timed_out": self.timed_out}
+            if self.cache_stats:
+                record["cache"] = merge_stats(self.cache_stats.values())
+            return 200, record
+        raise HTTPError(404, "no route for %s %s" % (method, path))
+
+    # one request per connection , answered with a JSON body
+    async def handle(self, reader, writer):
+        try:
+            status, record = await self.respond(reader)
+            payload = json.dumps(record).encode()
+            head = "HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n" \
+                   % (status, REASONS.get(status, ""), len(payload))
+            if status == 503:
+                head += "Retry-After: 1\r\n"
+            writer.write((head + "Connection: close\r\n\r\n").encode() + payload)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, reader):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            if len(request_line) != 3:
+                raise HTTPError(400, "bad request line")
+            method, path, _ = request_line
+            length = 0
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            if length > MAX_BODY_BYTES:
+                raise HTTPError(400, "request body too large")
+            body = json.loads(await reader.readexactly(length)) if length else {}
+            if not isinstance(body, dict):
+                raise HTTPError(400, "the body must be a JSON object")
+            status, record = await self.route(method, path, body)
+            self.served += 1
+            return status, record
+        except HTTPError as error:
+            return error.status, {"error": error.message}
+        except (ValueError, asyncio.IncompleteReadError) as error:
+            return 400, {"error": str(error)}
+
+
+async def serve(server, host, port):
+    listener = await asyncio.start_server(server.handle, host, port)
+    print("serving games on %s:%d" % (host, port), file=sys.stderr)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON HTTP server for many concurrent games.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8404)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="search worker processes")
+    parser.add_argument("--move-time-ms", type=float, default=200, help="search budget of every AI move")
+    parser.add_argument("--deadline-ms", type=float, default=2000,
+                        help="time an AI move may take with the wait for a worker , 504 after it")
+    parser.add_argument("--max-pending", type=int, help="searches queued or running before 503 , 2 per worker")
+    parser.add_argument("--book", help="opening book file built with book.py")
+    parser.add_argument("--cache", help="SQLite file of the positions searched , shared by the workers and kept "
+                                        "across restarts")
+    args = parser.parse_args()
+
+    server = GameServer(args.workers, args.move_time_ms, args.deadline_ms, args.max_pending, book_file=args.book,
+                        cache_file=args.cache)
+    try:
+        asyncio.run(serve(server, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import json
+import time
+
+
+# what a search did for one move : nodes per ply , leaf evaluations , cutoffs and where the time went
+# searches only record into it when one is passed to them , without it they do no extra work
+class SearchStats:
+    def __init__(self):
+        # nodes_by_ply[ply] is the number of nodes expanded at that distance from the root
+        self.nodes_by_ply = []
+        self.leaves = 0
+        # cutoffs of maximizing nodes (score >= beta) and of minimizing nodes (score <= alpha)
+        self.beta_cutoffs = 0
+        self.alpha_cutoffs = 0
+        # nodes decided by a transposition table entry without searching them
+        self.table_cutoffs = 0
+        # deepest search finished , the last iteration for iterative deepening
+        self.depth_reached = 0
+        # seconds spent in each phase : generate_children , evaluate , search , graph_export
+        self.timings = {}
+        # moves played in the root position , the tree search counts plies from it
+        self.root_ply = 0
+
+    def count_node(self, ply):
+        while len(self.nodes_by_ply) <= ply:
+            self.nodes_by_ply.append(0)
+        self.nodes_by_ply[ply] += 1
+
+    # adds nodes counted elsewhere , like the worker processes of the parallel search
+    def add_nodes(self, ply, count):
+        while len(self.nodes_by_ply) <= ply:
+            self.nodes_by_ply.append(0)
+        self.nodes_by_ply[ply] += count
+
+    def add_time(self, phase, seconds):
+        self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+
+    # times the block and adds it to a phase :  with stats.timer("search"): ...
+    def timer(self, phase):
+        return PhaseTimer(self, phase)
+
+    def nodes(self):
+        return sum(self.nodes_by_ply)
+
+    # geometric mean of the growth of the node count from one ply to the next
+    def effective_branching_factor(self):
+        plies = len(self.nodes_by_ply) - 1
+        if plies < 1 or not self.nodes_by_ply[0]:
+            return 0.0
+        return (self.nodes_by_ply[plies] / self.nodes_by_ply[0]) ** (1 / plies)
+
+    def to_dict(self):
+        return {
+            "nodes": self.nodes(),
+            "nodes_by_ply": self.nodes_by_ply,
+            "leaves": self.leaves,
+            "beta_cutoffs": self.beta_cutoffs,
+            "alpha_cutoffs": self.alpha_cutoffs,
+            "table_cutoffs": self.table_cutoffs,
+            "depth_reached": self.depth_reached,
+            "effective_branching_factor": round(self.effective_branching_factor(), 3),
+            "timings_ms": {phase: round(seconds * 1000, 3) for phase, seconds in self.timings.items()},
+        }
+
+    # the stats as one JSON line for the logs
+    def log_line(self, **fields):
+        record = dict(fields)
+        record.update(self.to_dict())
+        return json.dumps(record)
+
+
+class PhaseTimer:
+    def __init__(self, stats, phase):
+        self.stats = stats
+        self.phase = phase
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stats.add_time(self.phase, time.perf_counter() - self.start)
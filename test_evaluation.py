@@ -0,0 +1,78 @@
+# differential test of the incremental evaluation against the full rescan of the board
+#
+#   python -m pytest -q test_evaluation.py
+#
+# random games with random take-backs are played on every size , after every move and every take-back the running
+# scores of IncrementalEvaluator must equal evaluate_board , and the batch evaluation of all the boards seen must
+# give the same scores , with other weights the batch evaluation must follow the incremental one
+import random
+import numpy
+import pytest
+from bitboard import BitBoard, AI_VALUE, PLAYER_VALUE, board_config
+from evaluation import IncrementalEvaluator, Weights, evaluate_board, evaluate_batch
+
+SIZES = [(6, 7, 4), (7, 8, 4), (6, 7, 5), (5, 5, 3)]
+GAMES = 20
+# weights unlike the default ones in every score
+RETUNED_WEIGHTS = Weights(5000, 700, 30, 3)
+
+
+@pytest.mark.parametrize("rows, columns, connect", SIZES)
+def test_incremental_matches_rescan(rows, columns, connect):
+    config = board_config(rows, columns, connect)
+    rng = random.Random(rows * 100 + columns * 10 + connect)
+    boards = []
+    expected = {PLAYER_VALUE: [], AI_VALUE: []}
+    for _ in range(GAMES):
+        # the evaluator follows every make and unmake of the state
+        state = BitBoard(config)
+        evaluator = IncrementalEvaluator(config=config)
+        played = []
+        attribute = AI_VALUE
+        while not state.is_full():
+            if played and rng.random() < 0.3:
+                col = played.pop()
+                row, attribute = state.unmake_move(col)
+                evaluator.remove(row, col, attribute)
+            else:
+                col = rng.choice(state.valid_columns())
+                evaluator.add(state.make_move(col, attribute), col, attribute)
+                played.append(col)
+                attribute = -attribute
+            board = state.to_numpy()
+            for piece in (PLAYER_VALUE, AI_VALUE):
+                score = evaluate_board(board, piece, connect)
+                assert evaluator.score(piece) == score
+                expected[piece].append(score)
+            boards.append(board)
+        # an evaluator rebuilt from the final state agrees with the one that followed the game
+        rebuilt = IncrementalEvaluator.from_state(state)
+        for piece in (PLAYER_VALUE, AI_VALUE):
+            assert rebuilt.score(piece) == evaluator.score(piece)
+
+    boards = numpy.array(boards)
+    for piece in (PLAYER_VALUE, AI_VALUE):
+        assert evaluate_batch(boards, piece, config).tolist() == expected[piece]
+
+
+@pytest.mark.parametrize("rows, columns, connect", SIZES)
+def test_batch_follows_weights(rows, columns, connect):
+    config = board_config(rows, columns, connect)
+    rng = random.Random(rows * 100 + columns * 10 + connect)
+    boards = []
+    expected = {PLAYER_VALUE: [], AI_VALUE: []}
+    for _ in range(GAMES):
+        state = BitBoard(config)
+        evaluator = IncrementalEvaluator(RETUNED_WEIGHTS, config)
+        attribute = AI_VALUE
+        while not state.is_full():
+            col = rng.choice(state.valid_columns())
+            evaluator.add(state.make_move(col, attribute), col, attribute)
+            attribute = -attribute
+            for piece in (PLAYER_VALUE, AI_VALUE):
+                expected[piece].append(evaluator.score(piece))
+            boards.append(state.to_numpy())
+
+    boards = numpy.array(boards)
+    for piece in (PLAYER_VALUE, AI_VALUE):
+        assert evaluate_batch(boards, piece, config, RETUNED_WEIGHTS).tolist() == expected[piece]
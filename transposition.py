@@ -0,0 +1,141 @@
+from array import array
+import random
+
+# the kind of bound a stored score is
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+# no best move stored
+NO_MOVE = -1
+
+# xor-ed into the position hash when it is the maximizing side's turn ,
+# the same board with the other side to move is a different search node
+MAX_TURN_ZOBRIST = random.Random(20240402).getrandbits(64)
+
+# bytes taken by one entry in the typed arrays : key 8 , score 8 , depth 1 , bound 1 , move 1
+ENTRY_BYTES = 19
+
+
+# fixed-size transposition table stored in parallel typed arrays so its memory never grows past the cap
+# every bucket has two slots : the first keeps the deepest search seen (depth-preferred) ,
+# the second is always replaced with the latest search
+class TranspositionTable:
+    def __init__(self, size_mb=16):
+        self.buckets_count = max(1, int(size_mb * 2 ** 20) // (2 * ENTRY_BYTES))
+        slots_count = 2 * self.buckets_count
+        self.keys = array('Q', bytes(8 * slots_count))
+        self.scores = array('q', bytes(8 * slots_count))
+        # depth -1 marks an empty slot
+        self.depths = array('b', [-1]) * slots_count
+        self.bounds = array('b', bytes(slots_count))
+        self.moves = array('b', [NO_MOVE]) * slots_count
+        self.probes = 0
+        self.hits = 0
+        self.cutoffs = 0
+        self.collisions = 0
+        self.stores = 0
+
+    # returns the slot holding the key or None , counts a collision when the bucket holds other positions
+    def lookup(self, key):
+        self.probes += 1
+        slot = (key % self.buckets_count) * 2
+        for index in (slot, slot + 1):
+            if self.depths[index] >= 0 and self.keys[index] == key:
+                self.hits += 1
+                return index
+        if self.depths[slot] >= 0:
+            self.collisions += 1
+        return None
+
+    # returns (depth , score , bound , move) of a stored position or None
+    def probe(self, key):
+        index = self.lookup(key)
+        if index is None:
+            return None
+        return self.depths[index], self.scores[index], self.bounds[index], self.moves[index]
+
+    # checks the stored entry of a position against the search window ,
+    # returns (score , alpha , beta , move) where score is not None when the stored score decides the node
+    def probe_window(self, key, depth, alpha, beta):
+        index = self.lookup(key)
+        if index is None:
+            return None, alpha, beta, NO_MOVE
+        score = self.scores[index]
+        bound = self.bounds[index]
+        move = self.moves[index]
+        if self.depths[index] < depth:
+            return None, alpha, beta, move
+        if bound == LOWER_BOUND and score > alpha:
+            alpha = score
+        elif bound == UPPER_BOUND and score < beta:
+            beta = score
+        if bound == EXACT or alpha >= beta:
+            self.cutoffs += 1
+            return score, alpha, beta, move
+        return None, alpha, beta, move
+
+    # the best move stored for a position , NO_MOVE if there is none
+    def best_move(self, key):
+        index = self.lookup(key)
+        if index is None:
+            return NO_MOVE
+        return self.moves[index]
+
+    def store(self, key, depth, score, bound, move):
+        self.stores += 1
+        slot = (key % self.buckets_count) * 2
+        # a search at least as deep as the stored one takes the depth-preferred slot ,
+        # anything else goes to the always-replace slot
+        if depth >= self.depths[slot]:
+            index = slot
+        else:
+            index = slot + 1
+        self.keys[index] = key
+        self.depths[index] = depth
+        self.scores[index] = score
+        self.bounds[index] = bound
+        self.moves[index] = move
+
+    # hits , cutoffs and collisions counted since the table was created
+    def stats(self):
+        used = len(self.depths) - self.depths.count(-1)
+        return {
+            "size_mb": len(self.keys) * ENTRY_BYTES / 2 ** 20,
+            "slots": len(self.keys),
+            "used": used,
+            "probes": self.probes,
+            "hits": self.hits,
+            "cutoffs": self.cutoffs,
+            "collisions": self.collisions,
+            "stores": self.stores,
+            "hit_rate": self.hits / self.probes if self.probes else 0.0,
+        }
+
+
+# the bound type of a score found with the window (alpha , beta)
+def bound_type(score, alpha, beta):
+    if score <= alpha:
+        return UPPER_BOUND
+    if score >= beta:
+        return LOWER_BOUND
+    return EXACT
+
+
+# the table key of a position , a position and its left-right mirror share one entry ,
+# the entry is kept in the orientation with the smaller hash and mirrored tells if state is the other one ,
+# then the moves read from and written to the entry go through table_move
+def table_key(state, max_turn):
+    mirrored = state.mirror_hash < state.hash
+    key = state.mirror_hash if mirrored else state.hash
+    if max_turn:
+        key ^= MAX_TURN_ZOBRIST
+    return key, mirrored
+
+
+# a move of the entry as a move of the position and back , both ways are the same reflection
+# config is the BoardConfig of the position
+def table_move(move, mirrored, config):
+    if mirrored and move != NO_MOVE:
+        return config.mirror_col(move)
+    return move